@@ -0,0 +1,48 @@
+import os
+import logging
+from typing import Optional
+from dotenv import load_dotenv
+
+try:
+    import redis.asyncio as aioredis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Keys are shared with the ML pipeline, which deletes them after new scores land.
+# Values are the encoded JSON response bodies, served back byte-for-byte.
+DASHBOARD_CACHE_KEY = "dashboard:v1"
+ANALYTICS_CACHE_KEY = "analytics:v1"
+EXPLANATION_CACHE_KEY = "explanation:v1:{company_id}"
+CACHE_TTL_SECONDS = 30
+
+_client = aioredis.from_url(REDIS_URL) if HAS_REDIS and REDIS_URL else None
+
+async def get_cached(key: str) -> Optional[bytes]:
+    """Return the cached body for key, or None on a miss or if Redis is unavailable"""
+    if _client is None:
+        return None
+    
+    try:
+        value = await _client.get(key)
+    except Exception as e:
+        logger.warning(f"Redis get failed for {key}: {e}")
+        return None
+    
+    return value or None
+
+async def set_cached(key: str, body: bytes, ttl: int = CACHE_TTL_SECONDS):
+    """Store an encoded response body under key with a short TTL"""
+    if _client is None:
+        return
+    
+    try:
+        await _client.setex(key, ttl, body)
+    except Exception as e:
+        logger.warning(f"Redis set failed for {key}: {e}")
@@ -1,8 +1,50 @@
-from database_sqlite import SessionLocal
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from contextvars import ContextVar
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Use SQLite if DATABASE_URL contains sqlite, otherwise use the original URL
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/credtech.db")
+
+if "sqlite" in DATABASE_URL:
+    # SQLite configuration
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so readers are not blocked by the ingestion writers, and serve
+        reads from a memory-mapped file with a larger page cache"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MB
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+else:
+    # PostgreSQL configuration
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=20,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_pre_ping=True,
+        # Hand out the most recently used connection: a small hot set stays busy, the rest sit idle
+        pool_use_lifo=True,
+        pool_recycle=1800
+    )
+
+# One session per request: the middleware in main.py sets a fresh scope token
+# on entry and calls SessionLocal.remove() when the response is done
+request_scope: ContextVar = ContextVar("request_scope", default=None)
+
+SessionLocal = scoped_session(
+    sessionmaker(autocommit=False, autoflush=False, bind=engine),
+    scopefunc=request_scope.get
+)
+
+async def get_db():
+    return SessionLocal()
@@ -1,25 +0,0 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Use SQLite if DATABASE_URL contains sqlite, otherwise use the original URL
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/credtech.db")
-
-if "sqlite" in DATABASE_URL:
-    # SQLite configuration
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    # PostgreSQL configuration
-    engine = create_engine(DATABASE_URL)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -5,7 +5,7 @@ Database initialization script that works with both PostgreSQL and SQLite
 
 import os
 import logging
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,6 +15,19 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Columns added to tables after their first release. SQLite has no ADD COLUMN IF NOT
+# EXISTS, so a database built from an older schema gets them before any index uses them
+SQLITE_ADDED_COLUMNS = [
+    ("news_events", "headline_hash", "BIGINT"),
+]
+
+def add_missing_sqlite_columns(cursor):
+    """Add SQLITE_ADDED_COLUMNS missing from existing tables; new tables already have them"""
+    for table, column, column_type in SQLITE_ADDED_COLUMNS:
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if columns and column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
 def init_database():
     """Initialize database with appropriate schema"""
     database_url = os.getenv("DATABASE_URL", "sqlite:///data/credtech.db")
@@ -36,17 +49,21 @@ def init_database():
         with open(schema_file, 'r') as f:
             schema_sql = f.read()
         
-        # Split by semicolon and execute each statement
-        statements = [stmt.strip() for stmt in schema_sql.split(';') if stmt.strip()]
-        
-        with engine.connect() as conn:
-            for statement in statements:
-                try:
-                    conn.execute(text(statement))
-                    conn.commit()
-                except Exception as e:
-                    logger.warning(f"Statement failed (might be expected): {e}")
-                    continue
+        # Run the whole schema in one transaction; every statement is
+        # idempotent so re-running against an existing database is safe, and the
+        # TimescaleDB calls in init.sql are skipped on a server without the extension
+        if "sqlite" in database_url:
+            conn = engine.raw_connection()
+            try:
+                # Tables from an older schema need their new columns before the
+                # script's indexes on them; the check is a no-op once they exist
+                add_missing_sqlite_columns(conn.cursor())
+                conn.executescript(f"BEGIN;\n{schema_sql}\nCOMMIT;")
+            finally:
+                conn.close()
+        else:
+            with engine.begin() as conn:
+                conn.exec_driver_sql(schema_sql)
         
         logger.info("Database initialized successfully!")
         return True
@@ -1,11 +1,32 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, select
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import os
 from datetime import datetime, timedelta
+from bisect import bisect_right
+from hashlib import blake2b
+from itertools import groupby, islice
 
-from database_sqlite import get_db
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+from cache import (
+    get_cached,
+    set_cached,
+    DASHBOARD_CACHE_KEY,
+    ANALYTICS_CACHE_KEY,
+    EXPLANATION_CACHE_KEY
+)
+from database import SessionLocal, get_db, request_scope
 from models import CreditScore, Company, FeatureImportance, NewsEvent
 from schemas import (
     CreditScoreResponse, 
@@ -14,10 +35,14 @@ from schemas import (
     DashboardData
 )
 
+# Browsers and proxies may reuse these responses briefly; new scores land every few minutes
+HTTP_CACHE_CONTROL = "max-age=15, stale-while-revalidate=60"
+
 app = FastAPI(
     title="CredTech API",
     description="Explainable Credit Intelligence Platform API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse if HAS_ORJSON else JSONResponse
 )
 
 # CORS middleware
@@ -29,6 +54,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def db_session_scope(request: Request, call_next):
+    """Give each request its own scoped session and release it afterwards"""
+    token = request_scope.set(object())
+    try:
+        return await call_next(request)
+    finally:
+        SessionLocal.remove()
+        request_scope.reset(token)
+
 @app.get("/")
 async def root():
     return {"message": "CredTech API is running"}
@@ -38,13 +73,17 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
 @app.get("/companies", response_model=List[CompanyResponse])
-async def get_companies(db: Session = Depends(get_db)):
+def get_companies(request: Request, db: Session = Depends(get_db)):
     """Get all companies in the system"""
-    companies = db.query(Company).all()
-    return companies
+    # Plain column rows serialized directly; response_model is kept for the OpenAPI schema
+    companies = db.execute(select(
+        Company.id, Company.symbol, Company.name,
+        Company.sector, Company.industry, Company.market_cap
+    )).mappings().all()
+    return _json_response([dict(company) for company in companies], request)
 
 @app.get("/companies/{company_id}/score", response_model=CreditScoreResponse)
-async def get_latest_score(company_id: int, db: Session = Depends(get_db)):
+def get_latest_score(company_id: int, db: Session = Depends(get_db)):
     """Get the latest credit score for a company"""
     score = db.query(CreditScore).filter(
         CreditScore.company_id == company_id
@@ -56,7 +95,7 @@ async def get_latest_score(company_id: int, db: Session = Depends(get_db)):
     return score
 
 @app.get("/companies/{company_id}/scores", response_model=List[CreditScoreResponse])
-async def get_score_history(
+def get_score_history(
     company_id: int, 
     days: int = 30,
     db: Session = Depends(get_db)
@@ -72,135 +111,32 @@ async def get_score_history(
     return scores
 
 @app.get("/companies/{company_id}/explanation", response_model=ExplanationResponse)
-async def get_score_explanation(company_id: int, db: Session = Depends(get_db)):
+async def get_score_explanation(company_id: int, request: Request, db: Session = Depends(get_db)):
     """Get explanation for the latest credit score"""
-    # Get latest score
-    latest_score = db.query(CreditScore).filter(
-        CreditScore.company_id == company_id
-    ).order_by(CreditScore.time.desc()).first()
+    cache_key = EXPLANATION_CACHE_KEY.format(company_id=company_id)
+    cached = await get_cached(cache_key)
+    if cached is not None:
+        return _bytes_response(cached, request)
     
-    if not latest_score:
-        raise HTTPException(status_code=404, detail="Score not found")
-    
-    # Get feature importance
-    features = db.query(FeatureImportance).filter(
-        FeatureImportance.company_id == company_id,
-        FeatureImportance.timestamp >= latest_score.time - timedelta(minutes=5)
-    ).all()
-    
-    # Get recent news events
-    recent_events = db.query(NewsEvent).filter(
-        NewsEvent.company_id == company_id,
-        NewsEvent.timestamp >= datetime.utcnow() - timedelta(days=7)
-    ).order_by(NewsEvent.timestamp.desc()).limit(5).all()
-    
-    return ExplanationResponse(
-        score=latest_score.score,
-        confidence=latest_score.confidence,
-        timestamp=latest_score.time,
-        feature_contributions=[
-            {
-                "feature": f.feature_name,
-                "importance": f.importance_value,
-                "shap_value": f.shap_value,
-                "current_value": f.feature_value
-            } for f in features
-        ],
-        recent_events=[
-            {
-                "timestamp": e.timestamp,
-                "headline": e.headline,
-                "sentiment": e.sentiment_score,
-                "impact": e.impact_score,
-                "event_type": e.event_type
-            } for e in recent_events
-        ],
-        summary=f"Credit score of {latest_score.score} with {latest_score.confidence}% confidence"
-    )
+    explanation = await run_in_threadpool(_build_score_explanation, db, company_id)
+    body = explanation.model_dump_json().encode()
+    await set_cached(cache_key, body)
+    return _bytes_response(body, request)
 
 @app.get("/dashboard", response_model=DashboardData)
-async def get_dashboard_data(db: Session = Depends(get_db)):
+async def get_dashboard_data(request: Request, db: Session = Depends(get_db)):
     """Get aggregated data for the dashboard"""
+    cached = await get_cached(DASHBOARD_CACHE_KEY)
+    if cached is not None:
+        return _bytes_response(cached, request)
+    
+    now = datetime.utcnow()
     try:
-        # Get all companies with their latest scores
-        companies_data = []
-        companies = db.query(Company).all()
-        
-        # If no companies exist, return sample data
-        if not companies:
-            companies_data = [
-                {
-                    "id": 1,
-                    "symbol": "AAPL",
-                    "name": "Apple Inc.",
-                    "sector": "Technology",
-                    "current_score": 750.0,
-                    "confidence": 85.0,
-                    "last_updated": datetime.utcnow()
-                },
-                {
-                    "id": 2,
-                    "symbol": "MSFT",
-                    "name": "Microsoft Corporation",
-                    "sector": "Technology",
-                    "current_score": 720.0,
-                    "confidence": 82.0,
-                    "last_updated": datetime.utcnow()
-                }
-            ]
-        else:
-            for company in companies:
-                latest_score = db.query(CreditScore).filter(
-                    CreditScore.company_id == company.id
-                ).order_by(CreditScore.time.desc()).first()
-                
-                if latest_score:
-                    companies_data.append({
-                        "id": company.id,
-                        "symbol": company.symbol,
-                        "name": company.name,
-                        "sector": company.sector,
-                        "current_score": float(latest_score.score),
-                        "confidence": float(latest_score.confidence) if latest_score.confidence else 75.0,
-                        "last_updated": latest_score.time
-                    })
-                else:
-                    # Add company without score
-                    companies_data.append({
-                        "id": company.id,
-                        "symbol": company.symbol,
-                        "name": company.name,
-                        "sector": company.sector,
-                        "current_score": 650.0,  # Default score
-                        "confidence": 70.0,
-                        "last_updated": datetime.utcnow()
-                    })
-        
-        # Get recent alerts (significant score changes)
-        alerts = []
-        for company in companies:
-            recent_scores = db.query(CreditScore).filter(
-                CreditScore.company_id == company.id,
-                CreditScore.time >= datetime.utcnow() - timedelta(hours=24)
-            ).order_by(CreditScore.time.desc()).limit(2).all()
-            
-            if len(recent_scores) >= 2:
-                score_change = float(recent_scores[0].score) - float(recent_scores[1].score)
-                if abs(score_change) > 5:  # Alert for changes > 5 points
-                    alerts.append({
-                        "company_symbol": company.symbol,
-                        "company_name": company.name,
-                        "score_change": score_change,
-                        "timestamp": recent_scores[0].time,
-                        "severity": "high" if abs(score_change) > 10 else "medium"
-                    })
-        
-        return DashboardData(
-            companies=companies_data,
-            alerts=alerts,
-            total_companies=len(companies_data),
-            last_updated=datetime.utcnow()
-        )
+        # The synchronous queries run in the threadpool so they do not block the event loop
+        result = await run_in_threadpool(_build_dashboard_data, db, now)
+        body = _render_json(result)
+        await set_cached(DASHBOARD_CACHE_KEY, body)
+        return _bytes_response(body, request)
     except Exception as e:
         # Return sample data if database query fails
         return DashboardData(
@@ -212,86 +148,28 @@ async def get_dashboard_data(db: Session = Depends(get_db)):
                     "sector": "Technology",
                     "current_score": 700.0,
                     "confidence": 80.0,
-                    "last_updated": datetime.utcnow()
+                    "last_updated": now
                 }
             ],
             alerts=[],
             total_companies=1,
-            last_updated=datetime.utcnow()
+            last_updated=now
         )
 
 @app.get("/analytics")
-async def get_analytics_data(db: Session = Depends(get_db)):
+async def get_analytics_data(request: Request, db: Session = Depends(get_db)):
     """Get analytics data for charts and visualizations"""
+    cached = await get_cached(ANALYTICS_CACHE_KEY)
+    if cached is not None:
+        return _bytes_response(cached, request)
+    
+    now = datetime.utcnow()
     try:
-        companies = db.query(Company).all()
-        
-        # Sector distribution
-        sector_counts = {}
-        for company in companies:
-            sector = company.sector or "Unknown"
-            sector_counts[sector] = sector_counts.get(sector, 0) + 1
-        
-        sector_distribution = [
-            {"name": sector, "value": count, "color": _get_sector_color(sector)}
-            for sector, count in sector_counts.items()
-        ]
-        
-        # If no data, return sample data
-        if not sector_distribution:
-            sector_distribution = [
-                {"name": "Technology", "value": 40, "color": "#1976d2"},
-                {"name": "Financial Services", "value": 25, "color": "#dc004e"},
-                {"name": "Healthcare", "value": 15, "color": "#4caf50"},
-                {"name": "Consumer Cyclical", "value": 12, "color": "#ff9800"},
-                {"name": "Energy", "value": 8, "color": "#9c27b0"}
-            ]
-        
-        # Score trends (sample data for now)
-        score_trends = [
-            {"month": "Jan", "avg_score": 680},
-            {"month": "Feb", "avg_score": 685},
-            {"month": "Mar", "avg_score": 690},
-            {"month": "Apr", "avg_score": 695},
-            {"month": "May", "avg_score": 700},
-            {"month": "Jun", "avg_score": 705}
-        ]
-        
-        # Risk distribution
-        risk_distribution = []
-        for company in companies:
-            latest_score = db.query(CreditScore).filter(
-                CreditScore.company_id == company.id
-            ).order_by(CreditScore.time.desc()).first()
-            
-            if latest_score:
-                risk_distribution.append({
-                    "company": company.symbol,
-                    "score": float(latest_score.score),
-                    "risk_level": _get_risk_level(float(latest_score.score))
-                })
-        
-        # Sample data if no real data
-        if not risk_distribution:
-            risk_distribution = [
-                {"company": "AAPL", "score": 750, "risk_level": "Low"},
-                {"company": "MSFT", "score": 720, "risk_level": "Low"},
-                {"company": "GOOGL", "score": 680, "risk_level": "Medium"},
-                {"company": "TSLA", "score": 620, "risk_level": "Medium"},
-                {"company": "JPM", "score": 700, "risk_level": "Low"}
-            ]
-        
-        return {
-            "sector_distribution": sector_distribution,
-            "score_trends": score_trends,
-            "risk_distribution": risk_distribution,
-            "summary": {
-                "total_companies": len(companies) if companies else 5,
-                "avg_score": sum(item["score"] for item in risk_distribution) / len(risk_distribution) if risk_distribution else 694,
-                "high_risk_count": len([item for item in risk_distribution if item["risk_level"] == "High"]),
-                "last_updated": datetime.utcnow()
-            }
-        }
+        # The synchronous queries run in the threadpool so they do not block the event loop
+        result = await run_in_threadpool(_build_analytics_data, db, now)
+        body = _render_json(result)
+        await set_cached(ANALYTICS_CACHE_KEY, body)
+        return _bytes_response(body, request)
     except Exception as e:
         # Return sample data on error
         return {
@@ -312,33 +190,298 @@ async def get_analytics_data(db: Session = Depends(get_db)):
                 "total_companies": 1,
                 "avg_score": 700,
                 "high_risk_count": 0,
-                "last_updated": datetime.utcnow()
+                "last_updated": now
             }
         }
 
+def _build_score_explanation(db: Session, company_id: int) -> ExplanationResponse:
+    """Query and assemble a score explanation; runs in the threadpool"""
+    # Get latest score together with its feature importance in one round-trip
+    latest_time = db.query(func.max(CreditScore.time)).filter(
+        CreditScore.company_id == company_id
+    ).scalar_subquery()
+    
+    rows = db.query(CreditScore, FeatureImportance).outerjoin(
+        FeatureImportance,
+        and_(
+            FeatureImportance.company_id == CreditScore.company_id,
+            FeatureImportance.timestamp >= _minutes_before(db, CreditScore.time, 5)
+        )
+    ).filter(
+        CreditScore.company_id == company_id,
+        CreditScore.time == latest_time
+    ).all()
+    
+    if not rows:
+        raise HTTPException(status_code=404, detail="Score not found")
+    
+    latest_score = rows[0][0]
+    features = [feature for _, feature in rows if feature is not None]
+    
+    # Get recent news events
+    recent_events = db.query(NewsEvent).filter(
+        NewsEvent.company_id == company_id,
+        NewsEvent.timestamp >= datetime.utcnow() - timedelta(days=7)
+    ).order_by(NewsEvent.timestamp.desc()).limit(5).all()
+    
+    return ExplanationResponse(
+        score=latest_score.score,
+        confidence=latest_score.confidence,
+        timestamp=latest_score.time,
+        feature_contributions=[
+            {
+                "feature": f.feature_name,
+                "importance": f.importance_value,
+                "shap_value": f.shap_value,
+                "current_value": f.feature_value
+            } for f in features
+        ],
+        recent_events=[
+            {
+                "timestamp": e.timestamp,
+                "headline": e.headline,
+                "sentiment": e.sentiment_score,
+                "impact": e.impact_score,
+                "event_type": e.event_type
+            } for e in recent_events
+        ],
+        summary=f"Credit score of {latest_score.score} with {latest_score.confidence}% confidence"
+    )
+
+def _build_dashboard_data(db: Session, now: datetime) -> Dict[str, Any]:
+    """Query and assemble the dashboard payload; runs in the threadpool"""
+    # Get all companies with their latest scores
+    companies_data = []
+    companies = db.execute(
+        select(Company.id, Company.symbol, Company.name, Company.sector)
+    ).all()
+    
+    # If no companies exist, return sample data
+    if not companies:
+        companies_data = [
+            {
+                "id": 1,
+                "symbol": "AAPL",
+                "name": "Apple Inc.",
+                "sector": "Technology",
+                "current_score": 750.0,
+                "confidence": 85.0,
+                "last_updated": now
+            },
+            {
+                "id": 2,
+                "symbol": "MSFT",
+                "name": "Microsoft Corporation",
+                "sector": "Technology",
+                "current_score": 720.0,
+                "confidence": 82.0,
+                "last_updated": now
+            }
+        ]
+    else:
+        latest_scores = _get_latest_scores(db)
+        for company in companies:
+            latest_score = latest_scores.get(company.id)
+    
+            if latest_score:
+                companies_data.append({
+                    "id": company.id,
+                    "symbol": company.symbol,
+                    "name": company.name,
+                    "sector": company.sector,
+                    "current_score": latest_score.score,
+                    "confidence": latest_score.confidence or 75.0,
+                    "last_updated": latest_score.time
+                })
+            else:
+                # Add company without score
+                companies_data.append({
+                    "id": company.id,
+                    "symbol": company.symbol,
+                    "name": company.name,
+                    "sector": company.sector,
+                    "current_score": 650.0,  # Default score
+                    "confidence": 70.0,
+                    "last_updated": now
+                })
+    
+    # Get recent alerts (significant score changes)
+    alerts = []
+    companies_by_id = {company.id: company for company in companies}
+    recent_scores = db.query(
+        CreditScore.company_id, CreditScore.time, CreditScore.score
+    ).filter(
+        CreditScore.time >= now - timedelta(hours=24)
+    ).order_by(CreditScore.company_id, CreditScore.time.desc()).all()
+    
+    for company_id, rows in groupby(recent_scores, key=lambda row: row.company_id):
+        rows = list(islice(rows, 2))
+        company = companies_by_id.get(company_id)
+    
+        if company and len(rows) >= 2:
+            score_change = rows[0].score - rows[1].score
+            if abs(score_change) > 5:  # Alert for changes > 5 points
+                alerts.append({
+                    "company_symbol": company.symbol,
+                    "company_name": company.name,
+                    "score_change": score_change,
+                    "timestamp": rows[0].time,
+                    "severity": "high" if abs(score_change) > 10 else "medium"
+                })
+    
+    result = {
+        "companies": companies_data,
+        "alerts": alerts,
+        "total_companies": len(companies_data),
+        "last_updated": now
+    }
+    return result
+
+def _build_analytics_data(db: Session, now: datetime) -> Dict[str, Any]:
+    """Query and assemble the analytics payload; runs in the threadpool"""
+    # Sector distribution
+    sector = func.coalesce(Company.sector, "Unknown")
+    sector_counts = db.query(sector, func.count(Company.id)).group_by(sector).all()
+    total_companies = sum(count for _, count in sector_counts)
+    
+    sector_distribution = [
+        {"name": name, "value": count, "color": _get_sector_color(name)}
+        for name, count in sector_counts
+    ]
+    
+    # If no data, return sample data
+    if not sector_distribution:
+        sector_distribution = [
+            {"name": "Technology", "value": 40, "color": "#1976d2"},
+            {"name": "Financial Services", "value": 25, "color": "#dc004e"},
+            {"name": "Healthcare", "value": 15, "color": "#4caf50"},
+            {"name": "Consumer Cyclical", "value": 12, "color": "#ff9800"},
+            {"name": "Energy", "value": 8, "color": "#9c27b0"}
+        ]
+    
+    # Score trends (sample data for now)
+    score_trends = [
+        {"month": "Jan", "avg_score": 680},
+        {"month": "Feb", "avg_score": 685},
+        {"month": "Mar", "avg_score": 690},
+        {"month": "Apr", "avg_score": 695},
+        {"month": "May", "avg_score": 700},
+        {"month": "Jun", "avg_score": 705}
+    ]
+    
+    # Risk distribution
+    latest_scores = _get_latest_scores(db)
+    risk_distribution = []
+    for company_id, symbol in db.execute(select(Company.id, Company.symbol).order_by(Company.id)):
+        latest_score = latest_scores.get(company_id)
+    
+        if latest_score:
+            risk_distribution.append({
+                "company": symbol,
+                "score": latest_score.score,
+                "risk_level": _get_risk_level(latest_score.score)
+            })
+    
+    # Sample data if no real data
+    if not risk_distribution:
+        risk_distribution = [
+            {"company": "AAPL", "score": 750, "risk_level": "Low"},
+            {"company": "MSFT", "score": 720, "risk_level": "Low"},
+            {"company": "GOOGL", "score": 680, "risk_level": "Medium"},
+            {"company": "TSLA", "score": 620, "risk_level": "Medium"},
+            {"company": "JPM", "score": 700, "risk_level": "Low"}
+        ]
+    
+    result = {
+        "sector_distribution": sector_distribution,
+        "score_trends": score_trends,
+        "risk_distribution": risk_distribution,
+        "summary": {
+            "total_companies": total_companies or 5,
+            "avg_score": sum(item["score"] for item in risk_distribution) / len(risk_distribution) if risk_distribution else 694,
+            "high_risk_count": len([item for item in risk_distribution if item["risk_level"] == "High"]),
+            "last_updated": now
+        }
+    }
+    return result
+
+def _get_latest_scores(db: Session) -> Dict[int, Row]:
+    """Get the latest credit score for every company in a single query"""
+    latest = select(
+        CreditScore.company_id,
+        func.max(CreditScore.time).label("time")
+    ).group_by(CreditScore.company_id).subquery()
+    
+    scores = db.execute(
+        select(
+            CreditScore.company_id, CreditScore.time,
+            CreditScore.score, CreditScore.confidence
+        ).join(
+            latest,
+            and_(
+                CreditScore.company_id == latest.c.company_id,
+                CreditScore.time == latest.c.time
+            )
+        )
+    ).all()
+    
+    return {score.company_id: score for score in scores}
+
+def _render_json(content: Any) -> bytes:
+    """Encode plain rows/dicts straight to JSON, bypassing response_model validation"""
+    if HAS_ORJSON:
+        return orjson.dumps(content)
+    return JSONResponse(jsonable_encoder(content)).body
+
+def _json_response(content: Any, request: Optional[Request] = None) -> Response:
+    """JSON response for plain rows/dicts; see _bytes_response for the request handling"""
+    return _bytes_response(_render_json(content), request)
+
+def _bytes_response(body: bytes, request: Optional[Request] = None) -> Response:
+    """Wrap an encoded JSON body. With a request, the body is tagged with an ETag
+    and a matching If-None-Match gets a 304"""
+    response = Response(body, media_type="application/json")
+    
+    if request is None:
+        return response
+    
+    etag = f'"{blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": HTTP_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    response.headers.update(headers)
+    return response
+
+def _minutes_before(db: Session, column, minutes: int):
+    """SQL expression for a timestamp column shifted back by a number of minutes"""
+    if db.bind.dialect.name == "sqlite":
+        return func.datetime(column, f"-{minutes} minutes")
+    return column - timedelta(minutes=minutes)
+
+SECTOR_COLORS = {
+    "Technology": "#1976d2",
+    "Financial Services": "#dc004e",
+    "Healthcare": "#4caf50",
+    "Consumer Cyclical": "#ff9800",
+    "Energy": "#9c27b0",
+    "Utilities": "#795548",
+    "Real Estate": "#607d8b",
+    "Materials": "#e91e63",
+    "Industrials": "#3f51b5"
+}
+
+# Score cut-offs and the risk level for each bucket they define
+RISK_THRESHOLDS = (650, 750)
+RISK_LEVELS = ("High", "Medium", "Low")
+
 def _get_sector_color(sector: str) -> str:
     """Get color for sector"""
-    colors = {
-        "Technology": "#1976d2",
-        "Financial Services": "#dc004e",
-        "Healthcare": "#4caf50",
-        "Consumer Cyclical": "#ff9800",
-        "Energy": "#9c27b0",
-        "Utilities": "#795548",
-        "Real Estate": "#607d8b",
-        "Materials": "#e91e63",
-        "Industrials": "#3f51b5"
-    }
-    return colors.get(sector, "#9e9e9e")
+    return SECTOR_COLORS.get(sector, "#9e9e9e")
 
 def _get_risk_level(score: float) -> str:
     """Get risk level based on credit score"""
-    if score >= 750:
-        return "Low"
-    elif score >= 650:
-        return "Medium"
-    else:
-        return "High"
+    return RISK_LEVELS[bisect_right(RISK_THRESHOLDS, score)]
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,17 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, BigInteger, Text, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, BigInteger, Text, Numeric, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///../credit_scoring.db")
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The engine and session factory live in database.py so the API process
+# shares a single connection pool
 Base = declarative_base()
 from datetime import datetime
 
@@ -28,19 +20,34 @@ class Company(Base):
     updated_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    credit_scores = relationship("CreditScore", back_populates="company")
-    feature_importance = relationship("FeatureImportance", back_populates="company")
-    news_events = relationship("NewsEvent", back_populates="company")
+    # These are whole time series; touching one without an explicit
+    # selectinload() raises instead of issuing a SELECT per company
+    credit_scores = relationship(
+        "CreditScore", back_populates="company", lazy="raise",
+        order_by="CreditScore.time.desc()"
+    )
+    feature_importance = relationship(
+        "FeatureImportance", back_populates="company", lazy="raise",
+        order_by="FeatureImportance.timestamp.desc()"
+    )
+    news_events = relationship(
+        "NewsEvent", back_populates="company", lazy="raise",
+        order_by="NewsEvent.timestamp.desc()"
+    )
 
 class CreditScore(Base):
     __tablename__ = "credit_scores"
     
     time = Column(DateTime, primary_key=True)
     company_id = Column(Integer, ForeignKey("companies.id"), primary_key=True)
-    score = Column(Numeric(5,2), nullable=False)
-    confidence = Column(Numeric(5,2))
+    score = Column(Float, nullable=False)
+    confidence = Column(Float)
     model_version = Column(String(50))
     
+    __table_args__ = (
+        Index("idx_credit_scores_company_time", company_id, time.desc()),
+    )
+    
     # Relationships
     company = relationship("Company", back_populates="credit_scores")
 
@@ -51,9 +58,13 @@ class FeatureImportance(Base):
     company_id = Column(Integer, ForeignKey("companies.id"))
     timestamp = Column(DateTime, nullable=False)
     feature_name = Column(String(100), nullable=False)
-    importance_value = Column(Numeric(10,6), nullable=False)
-    shap_value = Column(Numeric(10,6))
-    feature_value = Column(Numeric(15,6))
+    importance_value = Column(Float, nullable=False)
+    shap_value = Column(Float)
+    feature_value = Column(Float)
+    
+    __table_args__ = (
+        Index("idx_feature_importance_company_time", company_id, timestamp.desc()),
+    )
     
     # Relationships
     company = relationship("Company", back_populates="feature_importance")
@@ -66,6 +77,19 @@ class FinancialData(Base):
     metric_name = Column(String(100), primary_key=True)
     value = Column(Numeric(20,6))
     source = Column(String(50))
+    
+    __table_args__ = (
+        Index(
+            "idx_financial_data_company_metric_value",
+            company_id, metric_name, time.desc(),
+            postgresql_include=["value"]
+        ),
+        Index(
+            "idx_financial_data_company_time",
+            company_id, time.desc(),
+            postgresql_include=["metric_name", "value", "source"]
+        ),
+    )
 
 class NewsEvent(Base):
     __tablename__ = "news_events"
@@ -74,13 +98,19 @@ class NewsEvent(Base):
     company_id = Column(Integer, ForeignKey("companies.id"))
     timestamp = Column(DateTime, nullable=False)
     headline = Column(Text, nullable=False)
+    headline_hash = Column(BigInteger)
     content = Column(Text)
     source = Column(String(100))
-    sentiment_score = Column(Numeric(5,2))
-    impact_score = Column(Numeric(5,2))
+    sentiment_score = Column(Float)
+    impact_score = Column(Float)
     event_type = Column(String(50))
     processed = Column(Boolean, default=False)
     
+    __table_args__ = (
+        Index("idx_news_events_company_time", company_id, timestamp.desc()),
+        Index("idx_news_events_dedup_hash", company_id, headline_hash, timestamp, unique=True),
+    )
+    
     # Relationships
     company = relationship("Company", back_populates="news_events")
 
@@ -89,11 +119,19 @@ class MarketData(Base):
     
     time = Column(DateTime, primary_key=True)
     symbol = Column(String(10), primary_key=True)
-    open_price = Column(Numeric(15,6))
-    high_price = Column(Numeric(15,6))
-    low_price = Column(Numeric(15,6))
-    close_price = Column(Numeric(15,6))
+    open_price = Column(Float)
+    high_price = Column(Float)
+    low_price = Column(Float)
+    close_price = Column(Float)
     volume = Column(BigInteger)
+    
+    __table_args__ = (
+        Index(
+            "idx_market_data_symbol_time_ohlcv",
+            symbol, time.desc(),
+            postgresql_include=["open_price", "high_price", "low_price", "close_price", "volume"]
+        ),
+    )
 
 class ModelPerformance(Base):
     __tablename__ = "model_performance"
@@ -101,10 +139,10 @@ class ModelPerformance(Base):
     id = Column(Integer, primary_key=True, index=True)
     model_version = Column(String(50), nullable=False)
     timestamp = Column(DateTime, nullable=False)
-    accuracy = Column(Numeric(5,4))
-    precision_score = Column(Numeric(5,4))
-    recall = Column(Numeric(5,4))
-    f1_score = Column(Numeric(5,4))
+    accuracy = Column(Float)
+    precision_score = Column(Float)
+    recall = Column(Float)
+    f1_score = Column(Float)
     training_samples = Column(Integer)
     validation_samples = Column(Integer)
 
@@ -112,7 +150,7 @@ class DataSourceStatus(Base):
     __tablename__ = "data_source_status"
     
     id = Column(Integer, primary_key=True, index=True)
-    source_name = Column(String(100), nullable=False)
+    source_name = Column(String(100), nullable=False, unique=True)
     last_update = Column(DateTime)
     status = Column(String(20), default='active')
     error_count = Column(Integer, default=0)
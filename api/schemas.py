@@ -1,7 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from decimal import Decimal
 
 class CompanyResponse(BaseModel):
     id: int
@@ -17,8 +16,8 @@ class CompanyResponse(BaseModel):
 class CreditScoreResponse(BaseModel):
     time: datetime
     company_id: int
-    score: Decimal
-    confidence: Optional[Decimal]
+    score: float
+    confidence: Optional[float]
     model_version: Optional[str]
     
     class Config:
@@ -26,20 +25,20 @@ class CreditScoreResponse(BaseModel):
 
 class FeatureContribution(BaseModel):
     feature: str
-    importance: Decimal
-    shap_value: Optional[Decimal]
-    current_value: Optional[Decimal]
+    importance: float
+    shap_value: Optional[float]
+    current_value: Optional[float]
 
 class RecentEvent(BaseModel):
     timestamp: datetime
     headline: str
-    sentiment: Optional[Decimal]
-    impact: Optional[Decimal]
+    sentiment: Optional[float]
+    impact: Optional[float]
     event_type: Optional[str]
 
 class ExplanationResponse(BaseModel):
-    score: Decimal
-    confidence: Optional[Decimal]
+    score: float
+    confidence: Optional[float]
     timestamp: datetime
     feature_contributions: List[FeatureContribution]
     recent_events: List[RecentEvent]
@@ -50,14 +49,14 @@ class CompanyDashboardData(BaseModel):
     symbol: str
     name: str
     sector: Optional[str]
-    current_score: Decimal
-    confidence: Optional[Decimal]
+    current_score: float
+    confidence: Optional[float]
     last_updated: datetime
 
 class Alert(BaseModel):
     company_symbol: str
     company_name: str
-    score_change: Decimal
+    score_change: float
     timestamp: datetime
     severity: str
 
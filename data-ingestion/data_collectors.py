@@ -1,15 +1,119 @@
 import yfinance as yf
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from textblob import TextBlob
+import json
 import logging
 import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
 from typing import Dict, List, Optional
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    HAS_VADER = True
+except ImportError:
+    from textblob import TextBlob
+    HAS_VADER = False
+
 logger = logging.getLogger(__name__)
 
+# VADER keeps its lexicon in memory, so one analyzer serves every headline
+_sentiment_analyzer = SentimentIntensityAnalyzer() if HAS_VADER else None
+
+# (connect, read) timeout for every outbound API call
+HTTP_TIMEOUT = (3, 15)
+
+# One pooled session for all collectors so TCP/TLS connections to the
+# news, Alpha Vantage and SEC hosts are reused between calls
+_HTTP = requests.Session()
+_HTTP.headers['User-Agent'] = os.getenv('SEC_EDGAR_USER_AGENT', 'CredTech Platform contact@credtech.com')
+_HTTP.mount('https://', HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, status_forcelist=[429, 502, 503, 504], backoff_factor=0.3)
+))
+
+class RateLimiter:
+    """Token bucket for one API, shared by every thread calling it; allows up to
+    ``burst`` back-to-back calls and only sleeps when callers get ahead of the rate"""
+    
+    def __init__(self, calls: int, period: float, burst: int = 1):
+        self.interval = period / calls
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._next_call = 0.0
+    
+    def wait(self):
+        """Block until a token is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._next_call = max(now, self._next_call) + self.interval
+            delay = self._next_call - now - self.burst * self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+# Alpha Vantage free tier: 5 calls per minute
+ALPHA_VANTAGE_LIMITER = RateLimiter(calls=5, period=60)
+# SEC fair access allows 10 requests per second; stay under it
+SEC_EDGAR_LIMITER = RateLimiter(calls=5, period=1)
+# Yahoo, News API and Google News publish no hard limit but throttle sustained
+# bursts, so short bursts up to the per-second rate are allowed
+YAHOO_FINANCE_LIMITER = RateLimiter(calls=2, period=1, burst=2)
+NEWS_API_LIMITER = RateLimiter(calls=5, period=1, burst=5)
+GOOGLE_NEWS_LIMITER = RateLimiter(calls=5, period=1, burst=5)
+
+# SEC's full ticker -> CIK list, cached on disk and refreshed weekly
+SEC_TICKERS_URL = 'https://www.sec.gov/files/company_tickers.json'
+CIK_CACHE_PATH = Path(os.getenv('SEC_CIK_CACHE_PATH', '~/.cache/credtech/cik.json')).expanduser()
+CIK_CACHE_MAX_AGE = timedelta(days=7)
+
+# Yahoo Finance history columns and their market_data counterparts
+MARKET_COLUMNS = {
+    'Open': 'open_price',
+    'High': 'high_price',
+    'Low': 'low_price',
+    'Close': 'close_price',
+    'Volume': 'volume'
+}
+
+def _parse_json(response: requests.Response):
+    """Decode a JSON response body, with orjson when it is installed"""
+    if HAS_ORJSON:
+        return orjson.loads(response.content)
+    return response.json()
+
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    """Compile keywords into one case-insensitive alternation (plain substring match)"""
+    return re.compile('|'.join(map(re.escape, keywords)), re.IGNORECASE)
+
+# Headline keywords that each add to a news event's impact score
+HIGH_IMPACT_PATTERN = _keyword_pattern([
+    'bankruptcy', 'acquisition', 'merger', 'lawsuit', 'investigation',
+    'earnings', 'revenue', 'profit', 'loss', 'debt', 'restructuring',
+    'ceo', 'resignation', 'appointed', 'partnership', 'contract'
+])
+
+# Event types in priority order; the first pattern found in the headline wins
+EVENT_TYPE_PATTERNS = [
+    ('financial', _keyword_pattern(['earnings', 'revenue', 'profit', 'loss'])),
+    ('corporate_action', _keyword_pattern(['acquisition', 'merger', 'partnership'])),
+    ('legal', _keyword_pattern(['lawsuit', 'investigation', 'fine'])),
+    ('management', _keyword_pattern(['ceo', 'cfo', 'resignation', 'appointed']))
+]
+
 class YahooFinanceCollector:
     def __init__(self, db_manager):
         self.db = db_manager
@@ -20,46 +124,90 @@ class YahooFinanceCollector:
             ticker = yf.Ticker(symbol)
             
             # Get recent data (last 5 days)
-            hist = ticker.history(period="5d", interval="1d")
-            
-            for date, row in hist.iterrows():
-                market_data = {
-                    'time': date,
-                    'symbol': symbol,
-                    'open_price': float(row['Open']),
-                    'high_price': float(row['High']),
-                    'low_price': float(row['Low']),
-                    'close_price': float(row['Close']),
-                    'volume': int(row['Volume'])
-                }
-                self.db.insert_market_data(market_data)
-            
-            # Get financial metrics
-            info = ticker.info
-            financial_metrics = {
-                'market_cap': info.get('marketCap'),
-                'pe_ratio': info.get('trailingPE'),
-                'debt_to_equity': info.get('debtToEquity'),
-                'current_ratio': info.get('currentRatio'),
-                'roe': info.get('returnOnEquity'),
-                'revenue_growth': info.get('revenueGrowth')
-            }
-            
-            company_id = self.db.get_company_id(symbol)
-            timestamp = datetime.utcnow()
-            
-            for metric, value in financial_metrics.items():
-                if value is not None:
-                    self.db.insert_financial_data({
-                        'time': timestamp,
-                        'company_id': company_id,
-                        'metric_name': metric,
-                        'value': float(value),
-                        'source': 'yahoo_finance'
-                    })
+            YAHOO_FINANCE_LIMITER.wait()
+            self.db.upsert_market_dataframe(self._price_bars(symbol, ticker.history(period="5d", interval="1d")))
+            self._insert_ticker_metrics(symbol, ticker)
                     
         except Exception as e:
             logger.error(f"Error collecting Yahoo Finance data for {symbol}: {e}")
+    
+    def collect_stock_data_bulk(self, symbols: List[str], period: str = '5d'):
+        """Collect daily prices for many symbols in one download; pass a longer
+        period (e.g. '5y') to backfill history"""
+        if not symbols:
+            return
+        
+        try:
+            data = yf.download(
+                tickers=' '.join(symbols),
+                period=period,
+                interval='1d',
+                group_by='ticker',
+                threads=True,
+                progress=False
+            )
+        except Exception as e:
+            # Raised so the caller records the source as failing, as per-ticker errors did
+            logger.error(f"Error downloading Yahoo Finance history for {len(symbols)} symbols: {e}")
+            raise
+        
+        frames = []
+        for symbol in symbols:
+            try:
+                # A single ticker comes back without the per-ticker column level
+                hist = data[symbol] if isinstance(data.columns, pd.MultiIndex) else data
+                # Rows are aligned across tickers, so drop days this symbol did not trade
+                frames.append(self._price_bars(symbol, hist.dropna(subset=list(MARKET_COLUMNS))))
+            except Exception as e:
+                logger.error(f"Error reading Yahoo Finance history for {symbol}: {e}")
+        
+        # yf.download reports failed tickers by leaving them out rather than raising
+        if not frames:
+            raise RuntimeError(f"Yahoo Finance returned no history for {len(symbols)} symbols")
+        
+        # Every symbol's bars go to the database in one upsert
+        self.db.upsert_market_dataframe(pd.concat(frames, ignore_index=True))
+    
+    def collect_ticker_metrics(self, symbol: str):
+        """Collect financial metrics from the ticker's info"""
+        try:
+            self._insert_ticker_metrics(symbol, yf.Ticker(symbol))
+        except Exception as e:
+            logger.error(f"Error collecting Yahoo Finance metrics for {symbol}: {e}")
+    
+    def _price_bars(self, symbol: str, hist: pd.DataFrame) -> pd.DataFrame:
+        """Daily OHLCV bars from a Yahoo history frame, shaped like market_data"""
+        # Whole-column conversions instead of boxing every cell via iterrows
+        bars = hist[list(MARKET_COLUMNS)].rename(columns=MARKET_COLUMNS).astype({'volume': 'int64'})
+        return bars.assign(time=hist.index, symbol=symbol).reset_index(drop=True)
+    
+    def _insert_ticker_metrics(self, symbol: str, ticker):
+        """Store the financial metrics Yahoo reports in the ticker's info"""
+        YAHOO_FINANCE_LIMITER.wait()
+        info = ticker.info
+        financial_metrics = {
+            'market_cap': info.get('marketCap'),
+            'pe_ratio': info.get('trailingPE'),
+            'debt_to_equity': info.get('debtToEquity'),
+            'current_ratio': info.get('currentRatio'),
+            'roe': info.get('returnOnEquity'),
+            'revenue_growth': info.get('revenueGrowth')
+        }
+        
+        company_id = self.db.get_company_id(symbol)
+        timestamp = datetime.utcnow()
+        
+        self.db.bulk_insert_financial_data([
+            {
+                'time': timestamp,
+                'company_id': company_id,
+                'metric_name': metric,
+                'value': float(value),
+                'source': 'yahoo_finance'
+            }
+            for metric, value in financial_metrics.items()
+            if value is not None
+        ])
 
 class AlphaVantageCollector:
     def __init__(self, db_manager):
@@ -81,8 +229,9 @@ class AlphaVantageCollector:
                 'apikey': self.api_key
             }
             
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
+            ALPHA_VANTAGE_LIMITER.wait()
+            response = _HTTP.get(self.base_url, params=params, timeout=HTTP_TIMEOUT)
+            data = _parse_json(response)
             
             if 'Symbol' not in data:
                 logger.warning(f"No data returned for {symbol}")
@@ -104,10 +253,11 @@ class AlphaVantageCollector:
                 'beta': data.get('Beta')
             }
             
+            financial_rows = []
             for metric, value in metrics.items():
                 if value and value != 'None':
                     try:
-                        self.db.insert_financial_data({
+                        financial_rows.append({
                             'time': timestamp,
                             'company_id': company_id,
                             'metric_name': metric,
@@ -116,6 +266,7 @@ class AlphaVantageCollector:
                         })
                     except ValueError:
                         continue
+            self.db.bulk_insert_financial_data(financial_rows)
                         
         except Exception as e:
             logger.error(f"Error collecting Alpha Vantage data for {symbol}: {e}")
@@ -149,13 +300,15 @@ class NewsCollector:
             'apiKey': self.news_api_key
         }
         
-        response = requests.get(self.base_url, params=params)
-        data = response.json()
+        NEWS_API_LIMITER.wait()
+        response = _HTTP.get(self.base_url, params=params, timeout=HTTP_TIMEOUT)
+        data = _parse_json(response)
         
         if data.get('status') == 'ok':
             articles = data.get('articles', [])
             company_id = self.db.get_company_id(symbol)
             
+            news_rows = []
             for article in articles[:10]:  # Limit to 10 articles
                 sentiment_score = self._analyze_sentiment(article['title'] + ' ' + (article['description'] or ''))
                 impact_score = self._calculate_impact_score(article['title'], sentiment_score)
@@ -171,7 +324,9 @@ class NewsCollector:
                     'event_type': self._classify_event_type(article['title'])
                 }
                 
-                self.db.insert_news_event(news_data)
+                news_rows.append(news_data)
+            
+            self.db.bulk_insert_news_events(news_rows)
     
     def _collect_from_rss_feeds(self, symbol: str, company_name: str):
         """Collect from free RSS feeds"""
@@ -183,17 +338,21 @@ class NewsCollector:
         rss_url = f"https://news.google.com/rss/search?q={encoded_name}&hl=en-US&gl=US&ceid=US:en"
         
         try:
-            feed = feedparser.parse(rss_url)
+            GOOGLE_NEWS_LIMITER.wait()
+            feed = feedparser.parse(_HTTP.get(rss_url, timeout=HTTP_TIMEOUT).content)
             company_id = self.db.get_company_id(symbol)
             
+            news_rows = []
             for entry in feed.entries[:5]:  # Limit to 5 articles
                 sentiment_score = self._analyze_sentiment(entry.title + ' ' + entry.get('summary', ''))
                 impact_score = self._calculate_impact_score(entry.title, sentiment_score)
                 
-                # Parse published date
-                published = datetime.utcnow()
+                # Parse published date; undated entries are stamped with the day they were
+                # collected so later runs hit the same (company_id, headline_hash, timestamp) key
                 if hasattr(entry, 'published_parsed') and entry.published_parsed:
                     published = datetime(*entry.published_parsed[:6])
+                else:
+                    published = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
                 
                 news_data = {
                     'company_id': company_id,
@@ -206,34 +365,32 @@ class NewsCollector:
                     'event_type': self._classify_event_type(entry.title)
                 }
                 
-                self.db.insert_news_event(news_data)
+                news_rows.append(news_data)
+            
+            self.db.bulk_insert_news_events(news_rows)
                 
         except Exception as e:
             logger.error(f"Error collecting RSS news for {symbol}: {e}")
     
     def _analyze_sentiment(self, text: str) -> float:
-        """Analyze sentiment using TextBlob"""
+        """Analyze sentiment using VADER, falling back to TextBlob"""
         try:
-            blob = TextBlob(text)
+            if HAS_VADER:
+                polarity = _sentiment_analyzer.polarity_scores(text)['compound']
+            else:
+                polarity = TextBlob(text).sentiment.polarity
             # Convert polarity (-1 to 1) to score (0 to 100)
-            return (blob.sentiment.polarity + 1) * 50
+            return (polarity + 1) * 50
         except:
             return 50.0  # Neutral sentiment
     
     def _calculate_impact_score(self, headline: str, sentiment: float) -> float:
         """Calculate potential impact score based on keywords and sentiment"""
-        high_impact_keywords = [
-            'bankruptcy', 'acquisition', 'merger', 'lawsuit', 'investigation',
-            'earnings', 'revenue', 'profit', 'loss', 'debt', 'restructuring',
-            'ceo', 'resignation', 'appointed', 'partnership', 'contract'
-        ]
-        
-        headline_lower = headline.lower()
         impact_score = 30.0  # Base impact
         
-        for keyword in high_impact_keywords:
-            if keyword in headline_lower:
-                impact_score += 20.0
+        # Each distinct keyword counts once, however often it appears
+        keywords_found = {match.lower() for match in HIGH_IMPACT_PATTERN.findall(headline)}
+        impact_score += 20.0 * len(keywords_found)
         
         # Adjust based on sentiment deviation from neutral
         sentiment_impact = abs(sentiment - 50) * 0.5
@@ -243,26 +400,20 @@ class NewsCollector:
     
     def _classify_event_type(self, headline: str) -> str:
         """Classify the type of event based on headline"""
-        headline_lower = headline.lower()
-        
-        if any(word in headline_lower for word in ['earnings', 'revenue', 'profit', 'loss']):
-            return 'financial'
-        elif any(word in headline_lower for word in ['acquisition', 'merger', 'partnership']):
-            return 'corporate_action'
-        elif any(word in headline_lower for word in ['lawsuit', 'investigation', 'fine']):
-            return 'legal'
-        elif any(word in headline_lower for word in ['ceo', 'cfo', 'resignation', 'appointed']):
-            return 'management'
-        else:
-            return 'general'
+        for event_type, pattern in EVENT_TYPE_PATTERNS:
+            if pattern.search(headline):
+                return event_type
+        return 'general'
 
 class SECEdgarCollector:
     def __init__(self, db_manager):
         self.db = db_manager
         self.base_url = 'https://data.sec.gov/submissions'
-        self.headers = {
-            'User-Agent': os.getenv('SEC_EDGAR_USER_AGENT', 'CredTech Platform contact@credtech.com')
-        }
+        self.headers = {'Accept-Encoding': 'gzip, deflate'}
+        # Collections fan out across threads; the lock makes the first one to need the
+        # CIK map load it while the others wait for it instead of each downloading it
+        self._cik_map = None
+        self._cik_lock = threading.Lock()
     
     def collect_filings(self, symbol: str):
         """Collect recent SEC filings"""
@@ -274,10 +425,11 @@ class SECEdgarCollector:
             
             # Get recent filings
             url = f"{self.base_url}/CIK{cik:010d}.json"
-            response = requests.get(url, headers=self.headers)
+            SEC_EDGAR_LIMITER.wait()
+            response = _HTTP.get(url, headers=self.headers, timeout=HTTP_TIMEOUT)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _parse_json(response)
                 recent_filings = data.get('filings', {}).get('recent', {})
                 
                 company_id = self.db.get_company_id(symbol)
@@ -286,6 +438,7 @@ class SECEdgarCollector:
                 forms = recent_filings.get('form', [])
                 filing_dates = recent_filings.get('filingDate', [])
                 
+                news_rows = []
                 for i, form in enumerate(forms[:10]):  # Limit to 10 recent filings
                     if form in ['10-K', '10-Q', '8-K']:
                         filing_date = datetime.strptime(filing_dates[i], '%Y-%m-%d')
@@ -302,20 +455,54 @@ class SECEdgarCollector:
                             'event_type': 'regulatory'
                         }
                         
-                        self.db.insert_news_event(news_data)
+                        news_rows.append(news_data)
+                
+                self.db.bulk_insert_news_events(news_rows)
                         
         except Exception as e:
             logger.error(f"Error collecting SEC data for {symbol}: {e}")
     
     def _get_company_cik(self, symbol: str) -> Optional[int]:
         """Get company CIK from symbol"""
-        # This is a simplified implementation
-        # In practice, you'd maintain a mapping or use SEC's company tickers JSON
-        cik_mapping = {
-            'AAPL': 320193,
-            'MSFT': 789019,
-            'GOOGL': 1652044,
-            'TSLA': 1318605,
-            'JPM': 19617
-        }
-        return cik_mapping.get(symbol)
\ No newline at end of file
+        with self._cik_lock:
+            if self._cik_map is None:
+                self._cik_map = self._load_cik_map()
+        return self._cik_map.get(symbol.upper())
+    
+    def _load_cik_map(self) -> Dict[str, int]:
+        """Symbol -> CIK for every SEC registrant, from the disk cache when it is fresh"""
+        cache_age = None
+        if CIK_CACHE_PATH.exists():
+            cache_age = datetime.now() - datetime.fromtimestamp(CIK_CACHE_PATH.stat().st_mtime)
+        
+        if cache_age is None or cache_age > CIK_CACHE_MAX_AGE:
+            try:
+                SEC_EDGAR_LIMITER.wait()
+                response = _HTTP.get(SEC_TICKERS_URL, headers=self.headers, timeout=HTTP_TIMEOUT)
+                response.raise_for_status()
+                cik_map = {
+                    row['ticker'].upper(): int(row['cik_str'])
+                    for row in _parse_json(response).values()
+                }
+                self._write_cik_cache(cik_map)
+                return cik_map
+            except Exception as e:
+                logger.error(f"Error refreshing SEC ticker list: {e}")
+        
+        # Fall back to a stale cache rather than skipping every filing
+        try:
+            return json.loads(CIK_CACHE_PATH.read_text())
+        except Exception as e:
+            logger.error(f"Error reading CIK cache {CIK_CACHE_PATH}: {e}")
+            return {}
+    
+    def _write_cik_cache(self, cik_map: Dict[str, int]):
+        """Write the CIK map atomically so a concurrent reader never sees half a file"""
+        try:
+            CIK_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=CIK_CACHE_PATH.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(cik_map, f)
+            os.replace(tmp_path, CIK_CACHE_PATH)
+        except Exception as e:
+            logger.error(f"Error writing CIK cache {CIK_CACHE_PATH}: {e}")
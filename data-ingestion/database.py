@@ -1,184 +1,344 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import TextClause, create_engine, event, text
+from sqlalchemy.orm import scoped_session, sessionmaker
 import os
+import io
+import csv
 import logging
+import threading
+import pandas as pd
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from hashlib import blake2b
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/credtech.db")
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL so writes do not block the API's readers, and commits that skip the
+    per-transaction fsync (synchronous=NORMAL is durable at checkpoints under WAL)"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def _numeric_as_float(dbapi_connection, connection_record):
+    """Have psycopg2 decode NUMERIC columns as float instead of Decimal"""
+    from psycopg2.extensions import DECIMAL, new_type, register_type
+    
+    numeric_as_float = new_type(
+        DECIMAL.values, "NUMERIC_AS_FLOAT",
+        lambda value, cursor: float(value) if value is not None else None
+    )
+    register_type(numeric_as_float, dbapi_connection)
+
+# One engine per process, shared by every DatabaseManager and collector
+if "sqlite" in DATABASE_URL:
+    # SQLite configuration
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", _sqlite_pragmas)
+else:
+    # PostgreSQL configuration
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=20,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_pre_ping=True,
+        # Hand out the most recently used connection: a small hot set stays busy, the rest sit idle
+        pool_use_lifo=True,
+        pool_recycle=1800,
+        # text() executemany batches go out as execute_batch pages, not one round trip per row
+        executemany_mode="values_plus_batch",
+        executemany_batch_page_size=1000
+    )
+    event.listen(engine, "connect", _numeric_as_float)
+
+# Smaller batches go through a plain multi-row INSERT ... ON CONFLICT
+COPY_MIN_ROWS = 100
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# One long-lived session per thread; collection jobs call remove() when they finish
+Session = scoped_session(SessionLocal)
+
+# Statements are built once at import rather than on every call
+SELECT_COMPANIES = text("SELECT id, symbol, name FROM companies")
+
+INSERT_NEWS_EVENTS = text("""
+    INSERT INTO news_events 
+    (company_id, timestamp, headline, headline_hash, content, source, sentiment_score, impact_score, event_type)
+    VALUES (:company_id, :timestamp, :headline, :headline_hash, :content, :source, :sentiment_score, :impact_score, :event_type)
+    ON CONFLICT (company_id, headline_hash, timestamp) DO NOTHING
+""")
+
+UPSERT_SOURCE_STATUS = text("""
+    INSERT INTO data_source_status (source_name, last_update, status, last_error, error_count)
+    VALUES (:source_name, :last_update, :status, :last_error, :error_count)
+    ON CONFLICT (source_name) DO UPDATE
+    SET last_update = excluded.last_update, status = excluded.status, last_error = excluded.last_error,
+        error_count = CASE WHEN excluded.status = 'error' THEN data_source_status.error_count + 1 ELSE 0 END
+""")
+
+SELECT_RECENT_FINANCIAL_DATA = text("""
+    SELECT metric_name, value, time, source
+    FROM financial_data
+    WHERE company_id = :company_id
+    AND time >= :start_date
+    ORDER BY time DESC
+""")
+
+def headline_hash(headline: str) -> int:
+    """Stable signed 64-bit digest of a headline (Python's hash() changes per process)"""
+    return int.from_bytes(blake2b(headline.encode(), digest_size=8).digest(), "big", signed=True)
+
+MARKET_DATA_COLUMNS = ("time", "symbol", "open_price", "high_price", "low_price", "close_price", "volume")
+MARKET_DATA_KEYS = ("time", "symbol")
+FINANCIAL_DATA_COLUMNS = ("time", "company_id", "metric_name", "value", "source")
+FINANCIAL_DATA_KEYS = ("time", "company_id", "metric_name")
+
+class UpsertStatements(NamedTuple):
+    create_staging: TextClause
+    copy_sql: str
+    merge_staging: TextClause
+    insert_values: TextClause
+
+@lru_cache(maxsize=None)
+def _upsert_statements(table: str, columns: Tuple[str, ...], keys: Tuple[str, ...]) -> UpsertStatements:
+    """Build the upsert statements for a table once"""
+    staging = f"{table}_staging"
+    column_list = ", ".join(columns)
+    placeholders = ", ".join(f":{column}" for column in columns)
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column not in keys)
+    on_conflict = f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+    
+    return UpsertStatements(
+        create_staging=text(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"),
+        copy_sql=f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)",
+        merge_staging=text(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} {on_conflict}"),
+        insert_values=text(f"INSERT INTO {table} ({column_list}) VALUES ({placeholders}) {on_conflict}")
+    )
+
 class DatabaseManager:
     def __init__(self):
-        self.database_url = os.getenv("DATABASE_URL", "sqlite:///data/credtech.db")
-        
-        if "sqlite" in self.database_url:
-            # SQLite configuration
-            self.engine = create_engine(self.database_url, connect_args={"check_same_thread": False})
-        else:
-            # PostgreSQL configuration
-            self.engine = create_engine(self.database_url)
-            
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.database_url = DATABASE_URL
+        self.engine = engine
+        self.SessionLocal = SessionLocal
+        self.Session = Session
+        # Symbol -> company id; companies are only added by the schema/seed scripts
+        self._company_ids: Dict[str, int] = {}
+        # Rows queued per writer while a batch() block is open
+        self._batch: Optional[Dict[Callable, List[Dict]]] = None
+        self._batch_size = 0
+        self._batch_depth = 0
+        self._batch_lock = threading.Lock()
     
+    @contextmanager
     def get_session(self):
-        return self.SessionLocal()
+        """This thread's session, reused across calls. A block that fails is rolled back;
+        one that leaves a transaction open (a read) has it committed so no connection is held"""
+        session = self.Session()
+        try:
+            yield session
+        except Exception:
+            session.rollback()
+            raise
+        if session.in_transaction():
+            session.commit()
+    
+    def remove_session(self):
+        """Close and discard this thread's session"""
+        self.Session.remove()
     
     def get_all_companies(self) -> List[Dict]:
         """Get all companies from database"""
         with self.get_session() as session:
-            result = session.execute(text("SELECT id, symbol, name FROM companies"))
-            return [{"id": row[0], "symbol": row[1], "name": row[2]} for row in result]
+            result = session.execute(SELECT_COMPANIES)
+            companies = [dict(row) for row in result.mappings()]
+        
+        # Every collection run starts here, so this keeps the id cache warm
+        self._company_ids.update((company["symbol"], company["id"]) for company in companies)
+        return companies
     
     def get_company_id(self, symbol: str) -> Optional[int]:
         """Get company ID by symbol"""
-        with self.get_session() as session:
-            result = session.execute(
-                text("SELECT id FROM companies WHERE symbol = :symbol"),
-                {"symbol": symbol}
-            )
-            row = result.fetchone()
-            return row[0] if row else None
+        company_id = self._company_ids.get(symbol)
+        if company_id is None:
+            # A miss reloads every symbol in one query rather than looking up just this one
+            self.get_all_companies()
+            company_id = self._company_ids.get(symbol)
+        return company_id
     
     def insert_market_data(self, data: Dict):
         """Insert market data"""
-        try:
-            with self.get_session() as session:
-                # Check if record exists
-                existing = session.execute(
-                    text("SELECT id FROM market_data WHERE time = :time AND symbol = :symbol"),
-                    {"time": data["time"], "symbol": data["symbol"]}
-                ).fetchone()
-                
-                if existing:
-                    # Update existing record
-                    session.execute(
-                        text("""
-                            UPDATE market_data 
-                            SET open_price = :open_price, high_price = :high_price, 
-                                low_price = :low_price, close_price = :close_price, volume = :volume
-                            WHERE time = :time AND symbol = :symbol
-                        """),
-                        data
-                    )
-                else:
-                    # Insert new record
-                    session.execute(
-                        text("""
-                            INSERT INTO market_data (time, symbol, open_price, high_price, low_price, close_price, volume)
-                            VALUES (:time, :symbol, :open_price, :high_price, :low_price, :close_price, :volume)
-                        """),
-                        data
-                    )
-                session.commit()
-        except Exception as e:
-            logger.error(f"Error inserting market data: {e}")
+        self.bulk_insert_market_data([data])
     
     def insert_financial_data(self, data: Dict):
         """Insert financial data"""
+        self.bulk_insert_financial_data([data])
+    
+    @contextmanager
+    def batch(self, size: int = 500):
+        """Queue the bulk inserts made inside the block (from any thread) and write
+        each table's rows together, flushing early once a table has `size` rows.
+        Blocks may overlap (concurrent jobs); each one flushes what is queued when it exits."""
+        with self._batch_lock:
+            if self._batch is None:
+                self._batch = defaultdict(list)
+                self._batch_size = size
+            self._batch_depth += 1
         try:
+            yield self
+        finally:
+            with self._batch_lock:
+                pending = dict(self._batch)
+                self._batch_depth -= 1
+                self._batch = defaultdict(list) if self._batch_depth else None
+            for write, rows in pending.items():
+                write(rows)
+    
+    def _write_or_queue(self, write: Callable[[List[Dict]], None], rows: List[Dict]):
+        """Write rows now, or add them to the open batch"""
+        with self._batch_lock:
+            if self._batch is None:
+                ready = rows
+            else:
+                queued = self._batch[write]
+                queued.extend(rows)
+                ready = self._batch.pop(write) if len(queued) >= self._batch_size else None
+        if ready:
+            write(ready)
+    
+    def bulk_insert_market_data(self, rows: List[Dict]):
+        """Upsert a batch of market data rows"""
+        self._write_or_queue(self._write_market_data, rows)
+    
+    def bulk_insert_financial_data(self, rows: List[Dict]):
+        """Upsert a batch of financial data rows"""
+        self._write_or_queue(self._write_financial_data, rows)
+    
+    def bulk_insert_news_events(self, rows: List[Dict]):
+        """Insert news events, skipping articles already stored (see idx_news_events_dedup_hash)"""
+        self._write_or_queue(self._write_news_events, rows)
+    
+    def _write_market_data(self, rows: List[Dict]):
+        try:
+            self._bulk_upsert(
+                "market_data",
+                MARKET_DATA_COLUMNS,
+                MARKET_DATA_KEYS,
+                rows
+            )
+        except Exception as e:
+            logger.error(f"Error bulk inserting market data: {e}")
+    
+    def _write_financial_data(self, rows: List[Dict]):
+        try:
+            self._bulk_upsert(
+                "financial_data",
+                FINANCIAL_DATA_COLUMNS,
+                FINANCIAL_DATA_KEYS,
+                rows
+            )
+        except Exception as e:
+            logger.error(f"Error bulk inserting financial data: {e}")
+    
+    def _bulk_upsert(self, table: str, columns: Tuple[str, ...], keys: Tuple[str, ...], rows: List[Dict]):
+        """Upsert rows in one transaction: COPY into a temp table and merge with a
+        single INSERT ... SELECT on PostgreSQL, one executemany on SQLite"""
+        if not rows:
+            return
+        
+        # ON CONFLICT cannot touch the same row twice in one statement; the last row for a key wins
+        rows = list({tuple(row[key] for key in keys): row for row in rows}.values())
+        statements = _upsert_statements(table, columns, keys)
+        
+        with self.get_session() as session:
+            # Staging through COPY only pays off once the batch is big enough
+            if self.engine.dialect.name == "postgresql" and len(rows) >= COPY_MIN_ROWS:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows([row[column] for column in columns] for row in rows)
+                self._copy_merge(session, statements, buffer)
+            else:
+                session.execute(statements.insert_values, rows)
+            session.commit()
+    
+    def _copy_merge(self, session, statements: UpsertStatements, buffer: io.StringIO):
+        """COPY CSV rows into the temp staging table and merge them into the target table"""
+        session.execute(statements.create_staging)
+        
+        buffer.seek(0)
+        cursor = session.connection().connection.cursor()
+        cursor.copy_expert(statements.copy_sql, buffer)
+        
+        session.execute(statements.merge_staging)
+    
+    def upsert_market_dataframe(self, df: pd.DataFrame):
+        """Upsert a frame with the market_data columns. Large frames on PostgreSQL are
+        rendered to CSV by pandas and COPYed, without building a dict per row."""
+        if df.empty:
+            return
+        
+        if self.engine.dialect.name != "postgresql" or len(df) < COPY_MIN_ROWS:
+            rows = df.drop(columns="time").to_dict("records")
+            for row, time in zip(rows, pd.DatetimeIndex(df["time"]).to_pydatetime()):
+                row["time"] = time
+            self.bulk_insert_market_data(rows)
+            return
+        
+        try:
+            # ON CONFLICT cannot touch the same row twice in one statement; the last row for a key wins
+            df = df.drop_duplicates(subset=list(MARKET_DATA_KEYS), keep="last")
+            buffer = io.StringIO()
+            df[list(MARKET_DATA_COLUMNS)].to_csv(buffer, index=False, header=False)
+            
             with self.get_session() as session:
-                # Check if record exists
-                existing = session.execute(
-                    text("SELECT id FROM financial_data WHERE time = :time AND company_id = :company_id AND metric_name = :metric_name"),
-                    {"time": data["time"], "company_id": data["company_id"], "metric_name": data["metric_name"]}
-                ).fetchone()
-                
-                if existing:
-                    # Update existing record
-                    session.execute(
-                        text("""
-                            UPDATE financial_data 
-                            SET value = :value, source = :source
-                            WHERE time = :time AND company_id = :company_id AND metric_name = :metric_name
-                        """),
-                        data
-                    )
-                else:
-                    # Insert new record
-                    session.execute(
-                        text("""
-                            INSERT INTO financial_data (time, company_id, metric_name, value, source)
-                            VALUES (:time, :company_id, :metric_name, :value, :source)
-                        """),
-                        data
-                    )
+                self._copy_merge(session, _upsert_statements("market_data", MARKET_DATA_COLUMNS, MARKET_DATA_KEYS), buffer)
                 session.commit()
         except Exception as e:
-            logger.error(f"Error inserting financial data: {e}")
+            logger.error(f"Error bulk inserting market data: {e}")
     
     def insert_news_event(self, data: Dict):
         """Insert news event"""
+        self.bulk_insert_news_events([data])
+    
+    def _write_news_events(self, rows: List[Dict]):
+        # The unique index needs the exact timestamp on a hypertable; within a batch,
+        # also collapse the same headline republished later on the same day
+        rows = list({
+            (row['company_id'], row['headline'], row['timestamp'].date()): row
+            for row in reversed(rows)
+        }.values())
+        rows = [{**row, 'headline_hash': headline_hash(row['headline'])} for row in rows]
+        if not rows:
+            return
+        
         try:
             with self.get_session() as session:
-                # Check if similar news already exists (avoid duplicates)
-                existing = session.execute(
-                    text("""
-                        SELECT id FROM news_events 
-                        WHERE company_id = :company_id 
-                        AND headline = :headline 
-                        AND date(timestamp) = date(:timestamp)
-                    """),
-                    {
-                        "company_id": data["company_id"],
-                        "headline": data["headline"],
-                        "timestamp": data["timestamp"]
-                    }
-                ).fetchone()
-                
-                if not existing:
-                    session.execute(
-                        text("""
-                            INSERT INTO news_events 
-                            (company_id, timestamp, headline, content, source, sentiment_score, impact_score, event_type)
-                            VALUES (:company_id, :timestamp, :headline, :content, :source, :sentiment_score, :impact_score, :event_type)
-                        """),
-                        data
-                    )
-                    session.commit()
+                session.execute(INSERT_NEWS_EVENTS, rows)
+                session.commit()
         except Exception as e:
-            logger.error(f"Error inserting news event: {e}")
+            logger.error(f"Error inserting news events: {e}")
     
     def update_source_status(self, source_name: str, status: str, error: str = None):
         """Update data source status"""
         try:
             with self.get_session() as session:
-                # Check if record exists
-                existing = session.execute(
-                    text("SELECT id FROM data_source_status WHERE source_name = :source_name"),
-                    {"source_name": source_name}
-                ).fetchone()
-                
-                if existing:
-                    # Update existing record
-                    session.execute(
-                        text("""
-                            UPDATE data_source_status 
-                            SET last_update = :last_update, status = :status, last_error = :last_error,
-                                error_count = CASE WHEN :status = 'error' THEN error_count + 1 ELSE 0 END
-                            WHERE source_name = :source_name
-                        """),
-                        {
-                            "source_name": source_name,
-                            "last_update": datetime.utcnow(),
-                            "status": status,
-                            "last_error": error
-                        }
-                    )
-                else:
-                    # Insert new record
-                    session.execute(
-                        text("""
-                            INSERT INTO data_source_status (source_name, last_update, status, last_error, error_count)
-                            VALUES (:source_name, :last_update, :status, :last_error, :error_count)
-                        """),
-                        {
-                            "source_name": source_name,
-                            "last_update": datetime.utcnow(),
-                            "status": status,
-                            "last_error": error,
-                            "error_count": 1 if status == 'error' else 0
-                        }
-                    )
+                session.execute(
+                    UPSERT_SOURCE_STATUS,
+                    {
+                        "source_name": source_name,
+                        "last_update": datetime.utcnow(),
+                        "status": status,
+                        "last_error": error,
+                        "error_count": 1 if status == 'error' else 0
+                    }
+                )
                 session.commit()
         except Exception as e:
             logger.error(f"Error updating source status: {e}")
@@ -187,21 +347,7 @@ class DatabaseManager:
         """Get recent financial data for a company"""
         with self.get_session() as session:
             result = session.execute(
-                text("""
-                    SELECT metric_name, value, time, source
-                    FROM financial_data
-                    WHERE company_id = :company_id
-                    AND time >= :start_date
-                    ORDER BY time DESC
-                """),
+                SELECT_RECENT_FINANCIAL_DATA,
                 {"company_id": company_id, "start_date": datetime.utcnow() - timedelta(days=days)}
             )
-            return [
-                {
-                    "metric_name": row[0],
-                    "value": float(row[1]) if row[1] else None,
-                    "time": row[2],
-                    "source": row[3]
-                }
-                for row in result
-            ]
\ No newline at end of file
+            return [dict(row) for row in result.mappings()]
\ No newline at end of file
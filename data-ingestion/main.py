@@ -1,8 +1,11 @@
 import schedule
 import time
+import asyncio
 import logging
 import os
+import threading
 from datetime import datetime
+from typing import Dict, List, Optional
 from data_collectors import (
     YahooFinanceCollector,
     AlphaVantageCollector,
@@ -15,6 +18,12 @@ from database import DatabaseManager
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on symbols fetched at the same time from one source
+MAX_CONCURRENT_COLLECTIONS = 16
+
+# Companies only change through the seed scripts; jobs share one list for this long
+COMPANY_LIST_TTL_SECONDS = 600
+
 class DataIngestionService:
     def __init__(self):
         self.db = DatabaseManager()
@@ -22,118 +31,163 @@ class DataIngestionService:
         self.alpha_vantage_collector = AlphaVantageCollector(self.db)
         self.news_collector = NewsCollector(self.db)
         self.sec_collector = SECEdgarCollector(self.db)
+        self._company_list: Optional[List[Dict]] = None
+        self._company_list_loaded = 0.0
         
     def collect_market_data(self):
         """Collect market data from Yahoo Finance"""
+        # Price history for every symbol comes back in a single download;
+        # ticker info has no batch endpoint, so it is still fetched per symbol
+        self._run_collection(
+            "market data",
+            "yahoo_finance",
+            lambda company: self.yahoo_collector.collect_ticker_metrics(company['symbol']),
+            prepare=lambda companies: self.yahoo_collector.collect_stock_data_bulk(
+                [company['symbol'] for company in companies]
+            )
+        )
+    
+    def backfill_market_data(self, period: str = "5y"):
+        """Load historical daily prices for every company; large batches take the COPY path"""
+        companies = self._companies()
+        logger.info(f"Backfilling {period} of market data for {len(companies)} companies...")
         try:
-            logger.info("Starting market data collection...")
-            companies = self.db.get_all_companies()
-            
-            for company in companies:
-                try:
-                    self.yahoo_collector.collect_stock_data(company['symbol'])
-                    logger.info(f"Collected market data for {company['symbol']}")
-                    time.sleep(1)  # Rate limiting
-                except Exception as e:
-                    logger.error(f"Error collecting market data for {company['symbol']}: {e}")
-                    continue
-                
-            logger.info("Market data collection completed")
-            self.update_data_source_status("yahoo_finance", "active")
+            self.yahoo_collector.collect_stock_data_bulk([company['symbol'] for company in companies], period=period)
+            logger.info("Market data backfill completed")
         except Exception as e:
-            logger.error(f"Error in market data collection: {e}")
-            self.update_data_source_status("yahoo_finance", "error", str(e))
+            logger.error(f"Market data backfill failed: {e}")
     
     def collect_financial_data(self):
         """Collect financial data from Alpha Vantage"""
-        try:
-            logger.info("Starting financial data collection...")
-            companies = self.db.get_all_companies()
-            
-            # Check if Alpha Vantage API key is configured
-            alpha_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-            if not alpha_key or alpha_key == 'demo':
-                logger.warning("Alpha Vantage API key not configured, skipping financial data collection")
-                return
-            
-            for company in companies:
-                try:
-                    self.alpha_vantage_collector.collect_financial_data(company['symbol'])
-                    logger.info(f"Collected financial data for {company['symbol']}")
-                    time.sleep(12)  # Alpha Vantage rate limit: 5 calls per minute
-                except Exception as e:
-                    logger.error(f"Error collecting financial data for {company['symbol']}: {e}")
-                    continue
-                
-            logger.info("Financial data collection completed")
-            self.update_data_source_status("alpha_vantage", "active")
-        except Exception as e:
-            logger.error(f"Error in financial data collection: {e}")
-            self.update_data_source_status("alpha_vantage", "error", str(e))
+        # Check if Alpha Vantage API key is configured
+        alpha_key = os.getenv('ALPHA_VANTAGE_API_KEY')
+        if not alpha_key or alpha_key == 'demo':
+            logger.warning("Alpha Vantage API key not configured, skipping financial data collection")
+            return
+        
+        # The collector's rate limiter keeps this within 5 calls per minute
+        self._run_collection(
+            "financial data",
+            "alpha_vantage",
+            lambda company: self.alpha_vantage_collector.collect_financial_data(company['symbol'])
+        )
     
     def collect_news_data(self):
         """Collect news and sentiment data"""
-        try:
-            logger.info("Starting news data collection...")
-            companies = self.db.get_all_companies()
-            
-            # Check if News API key is configured
-            news_key = os.getenv('NEWS_API_KEY')
-            if not news_key or news_key == 'demo':
-                logger.warning("News API key not configured, using RSS feeds only")
-            
-            for company in companies:
-                try:
-                    self.news_collector.collect_company_news(company['symbol'], company['name'])
-                    logger.info(f"Collected news data for {company['symbol']}")
-                    time.sleep(2)  # Rate limiting
-                except Exception as e:
-                    logger.error(f"Error collecting news data for {company['symbol']}: {e}")
-                    continue
-                
-            logger.info("News data collection completed")
-            self.update_data_source_status("news_api", "active")
-        except Exception as e:
-            logger.error(f"Error in news data collection: {e}")
-            self.update_data_source_status("news_api", "error", str(e))
+        # Check if News API key is configured
+        news_key = os.getenv('NEWS_API_KEY')
+        if not news_key or news_key == 'demo':
+            logger.warning("News API key not configured, using RSS feeds only")
+        
+        self._run_collection(
+            "news data",
+            "news_api",
+            lambda company: self.news_collector.collect_company_news(company['symbol'], company['name'])
+        )
     
     def collect_sec_data(self):
         """Collect SEC filing data"""
+        self._run_collection(
+            "SEC data",
+            None,
+            lambda company: self.sec_collector.collect_filings(company['symbol'])
+        )
+    
+    def _companies(self) -> List[Dict]:
+        """Company list shared by every job; reloaded at most every COMPANY_LIST_TTL_SECONDS"""
+        if self._company_list is None or time.monotonic() - self._company_list_loaded > COMPANY_LIST_TTL_SECONDS:
+            self._company_list = self.db.get_all_companies()
+            self._company_list_loaded = time.monotonic()
+        return self._company_list
+    
+    def _run_collection(self, description: str, source_name: Optional[str], collect_one, prepare=None):
+        """Run one scheduled collection over every company and record the source's status"""
         try:
-            logger.info("Starting SEC data collection...")
-            companies = self.db.get_all_companies()
+            logger.info(f"Starting {description} collection...")
+            companies = self._companies()
             
-            for company in companies:
-                self.sec_collector.collect_filings(company['symbol'])
-                time.sleep(5)  # SEC rate limiting
-                
-            logger.info("SEC data collection completed")
+            if prepare:
+                prepare(companies)
+            self._collect_concurrently(companies, collect_one, description)
+            
+            logger.info(f"Finished {description} collection")
+            if source_name:
+                self.update_data_source_status(source_name, "active")
         except Exception as e:
-            logger.error(f"Error in SEC data collection: {e}")
+            logger.error(f"Error in {description} collection: {e}")
+            if source_name:
+                self.update_data_source_status(source_name, "error", str(e))
+        finally:
+            self.db.remove_session()
+    
+    def _collect_concurrently(self, companies, collect, description: str):
+        """Run a blocking per-company collector for all companies at once.
+        Each call runs in a worker thread; the semaphore caps how many are in flight."""
+        async def run_all():
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_COLLECTIONS)
+            
+            async def run_one(company):
+                async with semaphore:
+                    try:
+                        await asyncio.to_thread(collect, company)
+                        logger.info(f"Collected {description} for {company['symbol']}")
+                    except Exception as e:
+                        logger.error(f"Error collecting {description} for {company['symbol']}: {e}")
+            
+            await asyncio.gather(*(run_one(company) for company in companies))
+        
+        # Every collector's rows are written in a few bulk statements instead of one per symbol
+        with self.db.batch():
+            asyncio.run(run_all())
     
     def update_data_source_status(self, source_name: str, status: str, error: str = None):
         """Update data source status"""
         self.db.update_source_status(source_name, status, error)
 
+def run_threaded(job):
+    """Wrap a job so the scheduler starts it on its own thread and a slow job never delays
+    the others; a run is skipped while the previous one is still going"""
+    running = threading.Lock()
+    
+    def run():
+        try:
+            job()
+        finally:
+            running.release()
+    
+    def start():
+        if not running.acquire(blocking=False):
+            logger.warning(f"{job.__name__} is still running, skipping this run")
+            return
+        threading.Thread(target=run, name=job.__name__, daemon=True).start()
+    
+    return start
+
 def main():
     service = DataIngestionService()
     
     # Schedule data collection jobs
-    schedule.every(5).minutes.do(service.collect_market_data)
-    schedule.every(15).minutes.do(service.collect_financial_data)
-    schedule.every(10).minutes.do(service.collect_news_data)
-    schedule.every(1).hours.do(service.collect_sec_data)
+    schedule.every(5).minutes.do(run_threaded(service.collect_market_data))
+    schedule.every(15).minutes.do(run_threaded(service.collect_financial_data))
+    schedule.every(10).minutes.do(run_threaded(service.collect_news_data))
+    schedule.every(1).hours.do(run_threaded(service.collect_sec_data))
     
     logger.info("Data ingestion service started")
     
+    # Optionally load price history (e.g. MARKET_BACKFILL_PERIOD=5y) before the first collection
+    backfill_period = os.getenv("MARKET_BACKFILL_PERIOD")
+    if backfill_period:
+        service.backfill_market_data(backfill_period)
+    
     # Run initial collection
     service.collect_market_data()
     service.collect_news_data()
     
-    # Keep the service running
+    # Keep the service running, sleeping until the next job is due instead of polling
     while True:
         schedule.run_pending()
-        time.sleep(60)
+        idle = schedule.idle_seconds()
+        time.sleep(max(idle, 0) if idle is not None else 60)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,8 +1,14 @@
--- Enable TimescaleDB extension
-CREATE EXTENSION IF NOT EXISTS timescaledb CASCADE;
+-- Enable TimescaleDB extension. On a server without it the tables below stay plain
+-- PostgreSQL tables: every TimescaleDB call in this file first checks pg_extension
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS timescaledb CASCADE;
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'TimescaleDB is not available; continuing without it';
+END $$;
 
 -- Companies/Issuers table
-CREATE TABLE companies (
+CREATE TABLE IF NOT EXISTS companies (
     id SERIAL PRIMARY KEY,
     symbol VARCHAR(10) UNIQUE NOT NULL,
     name VARCHAR(255) NOT NULL,
@@ -14,31 +20,36 @@ CREATE TABLE companies (
 );
 
 -- Credit scores time series
-CREATE TABLE credit_scores (
+CREATE TABLE IF NOT EXISTS credit_scores (
     time TIMESTAMPTZ NOT NULL,
     company_id INTEGER REFERENCES companies(id),
-    score DECIMAL(5,2) NOT NULL,
-    confidence DECIMAL(5,2),
+    score DOUBLE PRECISION NOT NULL,
+    confidence DOUBLE PRECISION,
     model_version VARCHAR(50),
     PRIMARY KEY (time, company_id)
 );
 
 -- Convert to hypertable for time-series optimization
-SELECT create_hypertable('credit_scores', 'time');
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb') THEN
+        PERFORM create_hypertable('credit_scores', 'time', if_not_exists => TRUE);
+    END IF;
+END $$;
 
 -- Feature importance for explainability
-CREATE TABLE feature_importance (
+CREATE TABLE IF NOT EXISTS feature_importance (
     id SERIAL PRIMARY KEY,
     company_id INTEGER REFERENCES companies(id),
     timestamp TIMESTAMPTZ NOT NULL,
     feature_name VARCHAR(100) NOT NULL,
-    importance_value DECIMAL(10,6) NOT NULL,
-    shap_value DECIMAL(10,6),
-    feature_value DECIMAL(15,6)
+    importance_value DOUBLE PRECISION NOT NULL,
+    shap_value DOUBLE PRECISION,
+    feature_value DOUBLE PRECISION
 );
 
 -- Financial data time series
-CREATE TABLE financial_data (
+CREATE TABLE IF NOT EXISTS financial_data (
     time TIMESTAMPTZ NOT NULL,
     company_id INTEGER REFERENCES companies(id),
     metric_name VARCHAR(100) NOT NULL,
@@ -47,51 +58,99 @@ CREATE TABLE financial_data (
     PRIMARY KEY (time, company_id, metric_name)
 );
 
-SELECT create_hypertable('financial_data', 'time');
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb') THEN
+        PERFORM create_hypertable('financial_data', 'time', chunk_time_interval => INTERVAL '30 days', if_not_exists => TRUE);
+    END IF;
+END $$;
 
 -- News and events
-CREATE TABLE news_events (
-    id SERIAL PRIMARY KEY,
+CREATE TABLE IF NOT EXISTS news_events (
+    id SERIAL,
     company_id INTEGER REFERENCES companies(id),
     timestamp TIMESTAMPTZ NOT NULL,
     headline TEXT NOT NULL,
+    headline_hash BIGINT,
     content TEXT,
     source VARCHAR(100),
-    sentiment_score DECIMAL(5,2),
-    impact_score DECIMAL(5,2),
+    sentiment_score DOUBLE PRECISION,
+    impact_score DOUBLE PRECISION,
     event_type VARCHAR(50),
-    processed BOOLEAN DEFAULT FALSE
+    processed BOOLEAN DEFAULT FALSE,
+    PRIMARY KEY (id, timestamp)
 );
 
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb') THEN
+        PERFORM create_hypertable('news_events', 'timestamp', chunk_time_interval => INTERVAL '30 days', if_not_exists => TRUE);
+    END IF;
+END $$;
+
+-- 64-bit headline digest written by the ingestion service; keys the dedup index
+ALTER TABLE news_events ADD COLUMN IF NOT EXISTS headline_hash BIGINT;
+
+-- Headlines older than a year no longer feed the sentiment features
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb') THEN
+        PERFORM add_retention_policy('news_events', INTERVAL '365 days', if_not_exists => TRUE);
+    END IF;
+END $$;
+
 -- Market data
-CREATE TABLE market_data (
+CREATE TABLE IF NOT EXISTS market_data (
     time TIMESTAMPTZ NOT NULL,
     symbol VARCHAR(10) NOT NULL,
-    open_price DECIMAL(15,6),
-    high_price DECIMAL(15,6),
-    low_price DECIMAL(15,6),
-    close_price DECIMAL(15,6),
+    open_price DOUBLE PRECISION,
+    high_price DOUBLE PRECISION,
+    low_price DOUBLE PRECISION,
+    close_price DOUBLE PRECISION,
     volume BIGINT,
     PRIMARY KEY (time, symbol)
 );
 
-SELECT create_hypertable('market_data', 'time');
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb') THEN
+        PERFORM create_hypertable('market_data', 'time', chunk_time_interval => INTERVAL '7 days', if_not_exists => TRUE);
+    END IF;
+END $$;
+
+-- Compress daily prices once they are older than a month; queries filter by symbol
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb') THEN
+        IF NOT EXISTS (
+            SELECT 1 FROM timescaledb_information.hypertables
+            WHERE hypertable_name = 'market_data' AND compression_enabled
+        ) THEN
+            ALTER TABLE market_data SET (
+                timescaledb.compress,
+                timescaledb.compress_segmentby = 'symbol',
+                timescaledb.compress_orderby = 'time DESC'
+            );
+        END IF;
+        PERFORM add_compression_policy('market_data', INTERVAL '30 days', if_not_exists => TRUE);
+    END IF;
+END $$;
 
 -- Model performance tracking
-CREATE TABLE model_performance (
+CREATE TABLE IF NOT EXISTS model_performance (
     id SERIAL PRIMARY KEY,
     model_version VARCHAR(50) NOT NULL,
     timestamp TIMESTAMPTZ NOT NULL,
-    accuracy DECIMAL(5,4),
-    precision_score DECIMAL(5,4),
-    recall DECIMAL(5,4),
-    f1_score DECIMAL(5,4),
+    accuracy DOUBLE PRECISION,
+    precision_score DOUBLE PRECISION,
+    recall DOUBLE PRECISION,
+    f1_score DOUBLE PRECISION,
     training_samples INTEGER,
     validation_samples INTEGER
 );
 
 -- Data source status
-CREATE TABLE data_source_status (
+CREATE TABLE IF NOT EXISTS data_source_status (
     id SERIAL PRIMARY KEY,
     source_name VARCHAR(100) NOT NULL UNIQUE,
     last_update TIMESTAMPTZ,
@@ -101,10 +160,21 @@ CREATE TABLE data_source_status (
 );
 
 -- Indexes for performance
-CREATE INDEX idx_credit_scores_company_time ON credit_scores (company_id, time DESC);
-CREATE INDEX idx_financial_data_company_metric ON financial_data (company_id, metric_name, time DESC);
-CREATE INDEX idx_news_events_company_time ON news_events (company_id, timestamp DESC);
-CREATE INDEX idx_market_data_symbol_time ON market_data (symbol, time DESC);
+CREATE INDEX IF NOT EXISTS idx_credit_scores_company_time ON credit_scores (company_id, time DESC);
+-- Covering: the latest-value-per-metric lookup is answered from the index alone
+DROP INDEX IF EXISTS idx_financial_data_company_metric;
+CREATE INDEX IF NOT EXISTS idx_financial_data_company_metric_value ON financial_data (company_id, metric_name, time DESC) INCLUDE (value);
+-- Covering: recent financial data for a company across all metrics
+CREATE INDEX IF NOT EXISTS idx_financial_data_company_time ON financial_data (company_id, time DESC) INCLUDE (metric_name, value, source);
+CREATE INDEX IF NOT EXISTS idx_news_events_company_time ON news_events (company_id, timestamp DESC);
+-- Enforces news de-duplication on an 8-byte headline digest rather than the full text;
+-- hypertable unique indexes must include the time column
+DROP INDEX IF EXISTS idx_news_events_dedup;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_news_events_dedup_hash ON news_events (company_id, headline_hash, timestamp);
+CREATE INDEX IF NOT EXISTS idx_feature_importance_company_time ON feature_importance (company_id, timestamp DESC);
+-- Covering: price-history reads per symbol never touch the heap
+DROP INDEX IF EXISTS idx_market_data_symbol_time;
+CREATE INDEX IF NOT EXISTS idx_market_data_symbol_time_ohlcv ON market_data (symbol, time DESC) INCLUDE (open_price, high_price, low_price, close_price, volume);
 
 -- Insert sample companies
 INSERT INTO companies (symbol, name, sector, industry, market_cap) VALUES
@@ -112,11 +182,13 @@ INSERT INTO companies (symbol, name, sector, industry, market_cap) VALUES
 ('MSFT', 'Microsoft Corporation', 'Technology', 'Software', 2800000000000),
 ('GOOGL', 'Alphabet Inc.', 'Technology', 'Internet Services', 1700000000000),
 ('TSLA', 'Tesla Inc.', 'Consumer Cyclical', 'Auto Manufacturers', 800000000000),
-('JPM', 'JPMorgan Chase & Co.', 'Financial Services', 'Banks', 450000000000);
+('JPM', 'JPMorgan Chase & Co.', 'Financial Services', 'Banks', 450000000000)
+ON CONFLICT (symbol) DO NOTHING;
 
 -- Insert initial data source status
 INSERT INTO data_source_status (source_name, status) VALUES
 ('yahoo_finance', 'active'),
 ('alpha_vantage', 'active'),
 ('sec_edgar', 'active'),
-('news_api', 'active');
\ No newline at end of file
+('news_api', 'active')
+ON CONFLICT (source_name) DO NOTHING;
\ No newline at end of file
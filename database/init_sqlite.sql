@@ -16,10 +16,10 @@ CREATE TABLE IF NOT EXISTS market_data (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     time DATETIME NOT NULL,
     symbol VARCHAR(10) NOT NULL,
-    open_price DECIMAL(15,4),
-    high_price DECIMAL(15,4),
-    low_price DECIMAL(15,4),
-    close_price DECIMAL(15,4),
+    open_price REAL,
+    high_price REAL,
+    low_price REAL,
+    close_price REAL,
     volume BIGINT,
     UNIQUE(time, symbol)
 );
@@ -42,10 +42,11 @@ CREATE TABLE IF NOT EXISTS news_events (
     company_id INTEGER NOT NULL,
     timestamp DATETIME NOT NULL,
     headline TEXT NOT NULL,
+    headline_hash BIGINT,
     content TEXT,
     source VARCHAR(100),
-    sentiment_score DECIMAL(5,2) DEFAULT 50.0,
-    impact_score DECIMAL(5,2) DEFAULT 30.0,
+    sentiment_score REAL DEFAULT 50.0,
+    impact_score REAL DEFAULT 30.0,
     event_type VARCHAR(50) DEFAULT 'general',
     FOREIGN KEY (company_id) REFERENCES companies(id)
 );
@@ -55,8 +56,8 @@ CREATE TABLE IF NOT EXISTS credit_scores (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     time DATETIME NOT NULL,
     company_id INTEGER NOT NULL,
-    score DECIMAL(5,2) NOT NULL,
-    confidence DECIMAL(5,4),
+    score REAL NOT NULL,
+    confidence REAL,
     model_version VARCHAR(50),
     FOREIGN KEY (company_id) REFERENCES companies(id),
     UNIQUE(time, company_id)
@@ -68,9 +69,9 @@ CREATE TABLE IF NOT EXISTS feature_importance (
     company_id INTEGER NOT NULL,
     timestamp DATETIME NOT NULL,
     feature_name VARCHAR(100) NOT NULL,
-    importance_value DECIMAL(10,6),
-    shap_value DECIMAL(10,6),
-    feature_value DECIMAL(15,4),
+    importance_value REAL,
+    shap_value REAL,
+    feature_value REAL,
     FOREIGN KEY (company_id) REFERENCES companies(id)
 );
 
@@ -79,10 +80,10 @@ CREATE TABLE IF NOT EXISTS model_performance (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     model_version VARCHAR(50) NOT NULL,
     timestamp DATETIME NOT NULL,
-    accuracy DECIMAL(5,4),
-    precision_score DECIMAL(5,4),
-    recall DECIMAL(5,4),
-    f1_score DECIMAL(5,4),
+    accuracy REAL,
+    precision_score REAL,
+    recall REAL,
+    f1_score REAL,
     training_samples INTEGER,
     validation_samples INTEGER
 );
@@ -99,8 +100,14 @@ CREATE TABLE IF NOT EXISTS data_source_status (
 
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_credit_scores_company_time ON credit_scores (company_id, time DESC);
-CREATE INDEX IF NOT EXISTS idx_financial_data_company_metric ON financial_data (company_id, metric_name, time DESC);
+-- SQLite has no INCLUDE; a trailing value column makes the index covering
+DROP INDEX IF EXISTS idx_financial_data_company_metric;
+CREATE INDEX IF NOT EXISTS idx_financial_data_company_metric_value ON financial_data (company_id, metric_name, time DESC, value);
+CREATE INDEX IF NOT EXISTS idx_financial_data_company_time ON financial_data (company_id, time DESC, metric_name, value, source);
 CREATE INDEX IF NOT EXISTS idx_news_events_company_time ON news_events (company_id, timestamp DESC);
+DROP INDEX IF EXISTS idx_news_events_dedup;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_news_events_dedup_hash ON news_events (company_id, headline_hash, timestamp);
+CREATE INDEX IF NOT EXISTS idx_feature_importance_company_time ON feature_importance (company_id, timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_market_data_symbol_time ON market_data (symbol, time DESC);
 
 -- Insert sample companies
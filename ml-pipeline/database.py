@@ -1,12 +1,81 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 import os
+import io
+import csv
 import logging
+import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Batches at least this large are streamed with COPY on PostgreSQL
+COPY_MIN_ROWS = 100
+
+FEATURE_IMPORTANCE_COLUMNS = (
+    "company_id", "timestamp", "feature_name", "importance_value", "shap_value", "feature_value"
+)
+
+# Re-scoring the same (time, company_id) replaces the earlier result; the same
+# syntax works on PostgreSQL and SQLite (3.24+)
+UPSERT_CREDIT_SCORE = text("""
+    INSERT INTO credit_scores (time, company_id, score, confidence, model_version)
+    VALUES (:time, :company_id, :score, :confidence, :model_version)
+    ON CONFLICT (time, company_id) DO UPDATE
+    SET score = excluded.score, confidence = excluded.confidence, model_version = excluded.model_version
+""")
+
+# Latest score per company: PostgreSQL probes the (company_id, time DESC) index once
+# per company; elsewhere one windowed pass replaces a correlated MAX per row
+SELECT_LATEST_CREDIT_SCORES_LATERAL = text("""
+    SELECT cs.company_id, cs.score, cs.confidence, cs.time, cs.model_version,
+           c.symbol, c.name, c.sector
+    FROM companies c
+    CROSS JOIN LATERAL (
+        SELECT company_id, score, confidence, time, model_version
+        FROM credit_scores
+        WHERE company_id = c.id
+        ORDER BY time DESC
+        LIMIT 1
+    ) cs
+    ORDER BY cs.company_id
+""")
+
+SELECT_LATEST_CREDIT_SCORES = text("""
+    SELECT cs.company_id, cs.score, cs.confidence, cs.time, cs.model_version,
+           c.symbol, c.name, c.sector
+    FROM (
+        SELECT company_id, score, confidence, time, model_version,
+               ROW_NUMBER() OVER (PARTITION BY company_id ORDER BY time DESC) AS rn
+        FROM credit_scores
+    ) cs
+    JOIN companies c ON cs.company_id = c.id
+    WHERE cs.rn = 1
+    ORDER BY cs.company_id
+""")
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL so writes do not block the API's readers, and commits that skip the
+    per-transaction fsync (synchronous=NORMAL is durable at checkpoints under WAL)"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def _numeric_as_float(dbapi_connection, connection_record):
+    """Have psycopg2 decode NUMERIC columns as float instead of Decimal"""
+    from psycopg2.extensions import DECIMAL, new_type, register_type
+    
+    numeric_as_float = new_type(
+        DECIMAL.values, "NUMERIC_AS_FLOAT",
+        lambda value, cursor: float(value) if value is not None else None
+    )
+    register_type(numeric_as_float, dbapi_connection)
+
 class DatabaseManager:
     def __init__(self):
         self.database_url = os.getenv("DATABASE_URL", "sqlite:///data/credtech.db")
@@ -14,20 +83,44 @@ class DatabaseManager:
         if "sqlite" in self.database_url:
             # SQLite configuration
             self.engine = create_engine(self.database_url, connect_args={"check_same_thread": False})
+            event.listen(self.engine, "connect", _sqlite_pragmas)
         else:
             # PostgreSQL configuration
-            self.engine = create_engine(self.database_url)
+            # text() executemany batches go out as execute_batch pages, not one round trip per row
+            self.engine = create_engine(
+                self.database_url,
+                pool_size=10,
+                max_overflow=20,
+                pool_timeout=30,
+                pool_pre_ping=True,
+                # Hand out the most recently used connection: a small hot set stays busy, the rest sit idle
+                pool_use_lifo=True,
+                pool_recycle=1800,
+                executemany_mode="values_plus_batch",
+                executemany_batch_page_size=1000
+            )
+            event.listen(self.engine, "connect", _numeric_as_float)
             
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
     
     def get_session(self):
         return self.SessionLocal()
     
+    @contextmanager
+    def bulk_session(self):
+        """Session for batch writes: everything commits once at the end, and on
+        PostgreSQL the commit does not wait for the WAL flush"""
+        with self.get_session() as session:
+            if self.engine.dialect.name == "postgresql":
+                session.execute(text("SET LOCAL synchronous_commit TO OFF"))
+            yield session
+            session.commit()
+    
     def get_all_companies(self) -> List[Dict]:
         """Get all companies from database"""
         with self.get_session() as session:
             result = session.execute(text("SELECT id, symbol, name FROM companies"))
-            return [{"id": row[0], "symbol": row[1], "name": row[2]} for row in result]
+            return [dict(row) for row in result.mappings()]
     
     def get_company_info(self, company_id: int) -> Optional[Dict]:
         """Get company information"""
@@ -36,132 +129,134 @@ class DatabaseManager:
                 text("SELECT id, symbol, name, sector, industry, market_cap FROM companies WHERE id = :company_id"),
                 {"company_id": company_id}
             )
-            row = result.fetchone()
-            if row:
-                return {
-                    "id": row[0],
-                    "symbol": row[1],
-                    "name": row[2],
-                    "sector": row[3],
-                    "industry": row[4],
-                    "market_cap": row[5]
-                }
-            return None
+            row = result.mappings().first()
+            return dict(row) if row else None
+    
+    def get_companies_df(self) -> pd.DataFrame:
+        """Get every company's id, symbol, sector and market cap as a DataFrame"""
+        with self.get_session() as session:
+            result = session.execute(text("SELECT id, symbol, sector, market_cap FROM companies ORDER BY id"))
+            df = pd.DataFrame(result.all(), columns=list(result.keys()))
+        
+        return df.astype({"market_cap": "float64"})
     
-    def get_recent_financial_data(self, company_id: int, days: int = 30) -> List[Dict]:
-        """Get recent financial data for a company"""
+    def get_latest_financial_metrics_bulk(self, days: int = 30) -> pd.DataFrame:
+        """Get the most recent value of each financial metric for every company, one row per pair"""
         with self.get_session() as session:
             result = session.execute(
                 text("""
-                    SELECT metric_name, value, time, source
-                    FROM financial_data
-                    WHERE company_id = :company_id
-                    AND time >= :start_date
-                    ORDER BY time DESC
+                    SELECT f.company_id, f.metric_name, CAST(f.value AS FLOAT) AS value
+                    FROM financial_data f
+                    JOIN (
+                        SELECT company_id, metric_name, MAX(time) AS time
+                        FROM financial_data
+                        WHERE time >= :start_date
+                        AND value IS NOT NULL
+                        GROUP BY company_id, metric_name
+                    ) latest ON f.company_id = latest.company_id
+                        AND f.metric_name = latest.metric_name
+                        AND f.time = latest.time
                 """),
-                {
-                    "company_id": company_id,
-                    "start_date": datetime.utcnow() - timedelta(days=days)
-                }
+                {"start_date": datetime.utcnow() - timedelta(days=days)}
             )
-            return [
-                {
-                    "metric_name": row[0],
-                    "value": float(row[1]) if row[1] else None,
-                    "time": row[2],
-                    "source": row[3]
-                }
-                for row in result
-            ]
+            df = pd.DataFrame(result.all(), columns=list(result.keys()))
+        
+        return df.astype({"value": "float64"})
     
-    def get_recent_market_data(self, symbol: str, days: int = 30) -> List[Dict]:
-        """Get recent market data for a symbol"""
+    def get_recent_market_data_bulk(self, days: int = 30) -> pd.DataFrame:
+        """Get recent market data for every symbol as a DataFrame, oldest first within each symbol"""
         with self.get_session() as session:
             result = session.execute(
                 text("""
-                    SELECT time, open_price, high_price, low_price, close_price, volume
+                    SELECT symbol, time, open_price, high_price, low_price, close_price, volume
                     FROM market_data
-                    WHERE symbol = :symbol
-                    AND time >= :start_date
-                    ORDER BY time ASC
+                    WHERE time >= :start_date
+                    ORDER BY symbol, time ASC
                 """),
-                {
-                    "symbol": symbol,
-                    "start_date": datetime.utcnow() - timedelta(days=days)
-                }
+                {"start_date": datetime.utcnow() - timedelta(days=days)}
             )
-            return [
-                {
-                    "time": row[0],
-                    "open_price": float(row[1]) if row[1] else None,
-                    "high_price": float(row[2]) if row[2] else None,
-                    "low_price": float(row[3]) if row[3] else None,
-                    "close_price": float(row[4]) if row[4] else None,
-                    "volume": int(row[5]) if row[5] else None
-                }
-                for row in result
-            ]
+            df = pd.DataFrame(result.all(), columns=list(result.keys()))
+        
+        df["time"] = pd.to_datetime(df["time"], format="ISO8601", utc=True)
+        return df.astype({
+            "open_price": "float64",
+            "high_price": "float64",
+            "low_price": "float64",
+            "close_price": "float64",
+            "volume": "float64"
+        })
     
-    def get_recent_news_events(self, company_id: int, days: int = 7) -> List[Dict]:
-        """Get recent news events for a company"""
+    def get_recent_news_events_bulk(self, days: int = 7) -> pd.DataFrame:
+        """Get recent news events for every company as a DataFrame, newest first within each company"""
         with self.get_session() as session:
             result = session.execute(
                 text("""
-                    SELECT timestamp, headline, sentiment_score, impact_score, event_type, source
+                    SELECT company_id, timestamp,
+                           COALESCE(sentiment_score, 50.0) AS sentiment_score,
+                           COALESCE(impact_score, 30.0) AS impact_score,
+                           COALESCE(NULLIF(event_type, ''), 'general') AS event_type
                     FROM news_events
-                    WHERE company_id = :company_id
-                    AND timestamp >= :start_date
-                    ORDER BY timestamp DESC
+                    WHERE timestamp >= :start_date
+                    ORDER BY company_id, timestamp DESC
                 """),
-                {
-                    "company_id": company_id,
-                    "start_date": datetime.utcnow() - timedelta(days=days)
-                }
+                {"start_date": datetime.utcnow() - timedelta(days=days)}
             )
-            return [
-                {
-                    "timestamp": row[0],
-                    "headline": row[1],
-                    "sentiment_score": float(row[2]) if row[2] else 50.0,
-                    "impact_score": float(row[3]) if row[3] else 30.0,
-                    "event_type": row[4] or 'general',
-                    "source": row[5]
-                }
-                for row in result
-            ]
+            df = pd.DataFrame(result.all(), columns=list(result.keys()))
+        
+        return df.astype({"sentiment_score": "float64", "impact_score": "float64"})
     
     def insert_credit_score(self, data: Dict):
-        """Insert credit score"""
+        """Insert or update a credit score"""
         try:
             with self.get_session() as session:
-                # Check if record exists
-                existing = session.execute(
-                    text("SELECT id FROM credit_scores WHERE time = :time AND company_id = :company_id"),
-                    {"time": data["time"], "company_id": data["company_id"]}
-                ).fetchone()
-                
-                if existing:
-                    # Update existing record
-                    session.execute(
-                        text("""
-                            UPDATE credit_scores 
-                            SET score = :score, confidence = :confidence, model_version = :model_version
-                            WHERE time = :time AND company_id = :company_id
-                        """),
-                        data
+                session.execute(UPSERT_CREDIT_SCORE, data)
+                session.commit()
+        except Exception as e:
+            logger.error(f"Error inserting credit score: {e}")
+    
+    def bulk_insert_credit_scores(self, rows: List[Dict]) -> bool:
+        """Insert or update a batch of credit scores with one executemany"""
+        if not rows:
+            return True
+        
+        try:
+            with self.bulk_session() as session:
+                session.execute(UPSERT_CREDIT_SCORE, rows)
+            return True
+        except Exception as e:
+            logger.error(f"Error bulk inserting credit scores: {e}")
+            return False
+    
+    def bulk_insert_feature_importance(self, rows: List[Dict]):
+        """Insert a batch of feature importance rows with one executemany"""
+        if not rows:
+            return
+        
+        try:
+            with self.bulk_session() as session:
+                if self.engine.dialect.name == "postgresql" and len(rows) >= COPY_MIN_ROWS:
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(
+                        [row[column] for column in FEATURE_IMPORTANCE_COLUMNS] for row in rows
+                    )
+                    buffer.seek(0)
+                    
+                    cursor = session.connection().connection.cursor()
+                    cursor.copy_expert(
+                        f"COPY feature_importance ({', '.join(FEATURE_IMPORTANCE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                        buffer
                     )
                 else:
-                    # Insert new record
                     session.execute(
                         text("""
-                            INSERT INTO credit_scores (time, company_id, score, confidence, model_version)
-                            VALUES (:time, :company_id, :score, :confidence, :model_version)
+                            INSERT INTO feature_importance 
+                            (company_id, timestamp, feature_name, importance_value, shap_value, feature_value)
+                            VALUES (:company_id, :timestamp, :feature_name, :importance_value, :shap_value, :feature_value)
                         """),
-                        data
+                        rows
                     )
-                session.commit()
         except Exception as e:
-            logger.error(f"Error inserting credit score: {e}")
+            logger.error(f"Error bulk inserting feature importance: {e}")
     
     def insert_feature_importance(self, data: Dict):
         """Insert feature importance"""
@@ -199,29 +294,8 @@ class DatabaseManager:
         """Get latest credit scores for all companies"""
         with self.get_session() as session:
             result = session.execute(
-                text("""
-                    SELECT cs.company_id, cs.score, cs.confidence, cs.time, cs.model_version,
-                           c.symbol, c.name, c.sector
-                    FROM credit_scores cs
-                    JOIN companies c ON cs.company_id = c.id
-                    WHERE cs.time = (
-                        SELECT MAX(time) 
-                        FROM credit_scores cs2 
-                        WHERE cs2.company_id = cs.company_id
-                    )
-                    ORDER BY cs.company_id
-                """)
+                SELECT_LATEST_CREDIT_SCORES_LATERAL
+                if self.engine.dialect.name == "postgresql"
+                else SELECT_LATEST_CREDIT_SCORES
             )
-            return [
-                {
-                    "company_id": row[0],
-                    "score": float(row[1]) if row[1] else None,
-                    "confidence": float(row[2]) if row[2] else None,
-                    "time": row[3],
-                    "model_version": row[4],
-                    "symbol": row[5],
-                    "name": row[6],
-                    "sector": row[7]
-                }
-                for row in result
-            ]
\ No newline at end of file
+            return [dict(row) for row in result.mappings()]
\ No newline at end of file
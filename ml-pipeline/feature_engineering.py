@@ -6,218 +6,265 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Value used for a financial metric a company has not reported in the window
+FINANCIAL_METRIC_FALLBACKS = {
+    'debt_to_equity': 0,
+    'current_ratio': 1,
+    'pe_ratio': 15,
+    'roe': 0.1,
+    'revenue_growth': 0,
+    'market_cap': 1000000000,
+    'total_revenue': 1000000000,
+    'total_assets': 1000000000,
+    'gross_profit': 100000000,
+    'net_income': 50000000,
+    'ebitda': 100000000
+}
+
+SECTOR_CODES = {
+    'Technology': 1,
+    'Financial Services': 2,
+    'Healthcare': 3,
+    'Consumer Cyclical': 4,
+    'Consumer Defensive': 5,
+    'Energy': 6,
+    'Utilities': 7,
+    'Real Estate': 8,
+    'Materials': 9,
+    'Industrials': 10
+}
+
+# News event types counted as features
+EVENT_TYPES = ['financial', 'legal', 'management', 'corporate_action']
+
+# Financial features for a company with no metrics in the window
+DEFAULT_FINANCIAL_FEATURES = {
+    'debt_to_equity': 0.5,
+    'current_ratio': 1.2,
+    'pe_ratio': 15.0,
+    'roe': 0.1,
+    'revenue_growth': 0.05,
+    'market_cap': 1000000000,
+    'total_revenue': 1000000000,
+    'total_assets': 1000000000,
+    'gross_profit': 200000000,
+    'net_income': 50000000,
+    'ebitda': 150000000,
+    'profit_margin': 0.05,
+    'gross_margin': 0.2,
+    'asset_turnover': 1.0,
+    'log_market_cap': 20.7,
+    'log_total_revenue': 20.7,
+    'log_total_assets': 20.7,
+    'log_gross_profit': 19.1,
+    'log_net_income': 17.7,
+    'log_ebitda': 18.8
+}
+
+# Market features for a symbol with no recent prices
+DEFAULT_MARKET_FEATURES = {
+    'current_price': 100.0,
+    'price_change_1d': 0.0,
+    'price_change_7d': 0.0,
+    'price_change_30d': 0.0,
+    'volatility_7d': 0.02,
+    'volatility_30d': 0.02,
+    'avg_volume_7d': 1000000,
+    'avg_volume_30d': 1000000,
+    'volume_trend': 0.0,
+    'rsi': 50.0,
+    'moving_avg_ratio': 1.0
+}
+
+# Sentiment features for a company with no recent news
+DEFAULT_SENTIMENT_FEATURES = {
+    'avg_sentiment_7d': 50.0,
+    'sentiment_trend': 0.0,
+    'sentiment_volatility': 5.0,
+    'avg_impact_7d': 30.0,
+    'max_impact_7d': 50.0,
+    'high_impact_events': 0,
+    'financial_events': 0,
+    'legal_events': 0,
+    'management_events': 0,
+    'corporate_action_events': 0,
+    'news_frequency_7d': 0
+}
+
 class FeatureEngineer:
     def __init__(self, db_manager):
         self.db = db_manager
     
-    def extract_features(self, company_id: int) -> Optional[pd.DataFrame]:
-        """Extract features for a specific company"""
+    def extract_features_bulk(self, companies: Optional[pd.DataFrame] = None) -> Optional[pd.DataFrame]:
+        """Extract features for every company, one row per company_id. Each source is
+        read with a single query and split per company in memory; pass the frame from
+        get_companies_df to reuse a companies list the caller already read"""
         try:
+            if companies is None:
+                companies = self.db.get_companies_df()
+            companies = companies.set_index('id')
+            
+            if companies.empty:
+                return None
+            
             # Get financial data
-            financial_features = self._extract_financial_features(company_id)
+            financial_features = self._extract_financial_features(companies.index)
             
             # Get market data features
-            market_features = self._extract_market_features(company_id)
+            market_features = self._extract_market_features(companies)
             
             # Get news sentiment features
-            sentiment_features = self._extract_sentiment_features(company_id)
+            sentiment_features = self._extract_sentiment_features(companies.index)
             
             # Get technical indicators
-            technical_features = self._extract_technical_features(company_id)
+            technical_features = self._extract_technical_features(companies)
             
             # Combine all features
-            all_features = {**financial_features, **market_features, **sentiment_features, **technical_features}
-            
-            if not all_features:
-                return None
-            
-            # Convert to DataFrame
-            features_df = pd.DataFrame([all_features])
+            features_df = pd.concat(
+                [financial_features, market_features, sentiment_features, technical_features], axis=1
+            )
+            features_df.index.name = 'company_id'
             
-            # Handle missing values
-            features_df = features_df.fillna(0)
-            
-            return features_df
+            # Handle missing values; float32 is all the model reads, at half the memory
+            return features_df.fillna(0).astype(np.float32)
             
         except Exception as e:
-            logger.error(f"Error extracting features for company {company_id}: {e}")
+            logger.error(f"Error extracting features: {e}")
             return None
     
-    def _extract_financial_features(self, company_id: int) -> Dict:
+    def _default_frame(self, company_ids: pd.Index, defaults: Dict) -> pd.DataFrame:
+        """One row of default features per company"""
+        return pd.DataFrame([defaults] * len(company_ids), index=company_ids)
+    
+    def _extract_financial_features(self, company_ids: pd.Index) -> pd.DataFrame:
         """Extract financial ratio and fundamental features"""
-        features = {}
+        defaults = self._default_frame(company_ids, DEFAULT_FINANCIAL_FEATURES)
         
         try:
-            # Get recent financial data (last 90 days)
-            financial_data = self.db.get_recent_financial_data(company_id, days=90)
-            
-            if not financial_data:
-                return self._get_default_financial_features()
-            
-            # Convert to DataFrame for easier processing
-            df = pd.DataFrame(financial_data)
-            
-            # Get latest values for each metric
-            latest_metrics = df.groupby('metric_name')['value'].last()
-            
-            # Financial ratios
-            features['debt_to_equity'] = latest_metrics.get('debt_to_equity', 0)
-            features['current_ratio'] = latest_metrics.get('current_ratio', 1)
-            features['pe_ratio'] = latest_metrics.get('pe_ratio', 15)
-            features['roe'] = latest_metrics.get('roe', 0.1)
-            features['revenue_growth'] = latest_metrics.get('revenue_growth', 0)
-            
-            # Size metrics
-            features['market_cap'] = latest_metrics.get('market_cap', 1000000000)
-            features['total_revenue'] = latest_metrics.get('total_revenue', 1000000000)
-            features['total_assets'] = latest_metrics.get('total_assets', 1000000000)
-            
-            # Profitability metrics
-            features['gross_profit'] = latest_metrics.get('gross_profit', 100000000)
-            features['net_income'] = latest_metrics.get('net_income', 50000000)
-            features['ebitda'] = latest_metrics.get('ebitda', 100000000)
+            # Latest value of each metric over the last 90 days, one column per metric
+            latest = self.db.get_latest_financial_metrics_bulk(days=90)
+            metrics = latest.pivot(index='company_id', columns='metric_name', values='value').reindex(company_ids)
+            features = metrics.reindex(columns=list(FINANCIAL_METRIC_FALLBACKS)).fillna(FINANCIAL_METRIC_FALLBACKS)
             
             # Calculate derived ratios
-            if features['total_revenue'] > 0:
-                features['profit_margin'] = features['net_income'] / features['total_revenue']
-                features['gross_margin'] = features['gross_profit'] / features['total_revenue']
-            else:
-                features['profit_margin'] = 0
-                features['gross_margin'] = 0
-            
-            if features['total_assets'] > 0:
-                features['asset_turnover'] = features['total_revenue'] / features['total_assets']
-            else:
-                features['asset_turnover'] = 0
+            revenue = features['total_revenue'].where(features['total_revenue'] > 0)
+            assets = features['total_assets'].where(features['total_assets'] > 0)
+            features['profit_margin'] = (features['net_income'] / revenue).fillna(0)
+            features['gross_margin'] = (features['gross_profit'] / revenue).fillna(0)
+            features['asset_turnover'] = (features['total_revenue'] / assets).fillna(0)
             
             # Normalize large values (log transformation)
-            for metric in ['market_cap', 'total_revenue', 'total_assets', 'gross_profit', 'net_income', 'ebitda']:
-                if features[metric] > 0:
-                    features[f'log_{metric}'] = np.log(features[metric])
-                else:
-                    features[f'log_{metric}'] = 0
+            sizes = features[['market_cap', 'total_revenue', 'total_assets', 'gross_profit', 'net_income', 'ebitda']]
+            features[sizes.columns.map('log_{}'.format)] = np.log(sizes.where(sizes > 0)).fillna(0)
+            
+            # Companies with no metrics at all get the default profile
+            has_metrics = metrics.notna().any(axis=1)
+            return features[defaults.columns].where(has_metrics, defaults, axis=0)
             
         except Exception as e:
             logger.error(f"Error extracting financial features: {e}")
-            features = self._get_default_financial_features()
-        
-        return features
+            return defaults
     
-    def _extract_market_features(self, company_id: int) -> Dict:
+    def _extract_market_features(self, companies: pd.DataFrame) -> pd.DataFrame:
         """Extract market-based features"""
+        try:
+            # Get recent market data for every symbol, oldest first within each symbol
+            prices = self.db.get_recent_market_data_bulk(days=30)
+            close = prices['close_price'].to_numpy(dtype=np.float64)
+            volume = prices['volume'].to_numpy(dtype=np.float64)
+            rows_by_symbol = prices.groupby('symbol', sort=False).indices
+            
+            return pd.DataFrame([
+                self._market_features(close[rows_by_symbol[symbol]], volume[rows_by_symbol[symbol]])
+                if symbol in rows_by_symbol else DEFAULT_MARKET_FEATURES
+                for symbol in companies['symbol']
+            ], index=companies.index)
+            
+        except Exception as e:
+            logger.error(f"Error extracting market features: {e}")
+            return self._default_frame(companies.index, DEFAULT_MARKET_FEATURES)
+    
+    def _market_features(self, close: np.ndarray, volume: np.ndarray) -> Dict:
+        """Market features from one symbol's close and volume arrays, oldest first"""
         features = {}
+        n = len(close)
         
         try:
-            # Get company symbol
-            company_info = self.db.get_company_info(company_id)
-            if not company_info:
-                return self._get_default_market_features()
-            
-            symbol = company_info['symbol']
-            
-            # Get recent market data
-            market_data = self.db.get_recent_market_data(symbol, days=30)
-            
-            if not market_data:
-                return self._get_default_market_features()
-            
-            df = pd.DataFrame(market_data)
-            df['time'] = pd.to_datetime(df['time'])
-            df = df.sort_values('time')
-            
-            # Price features
-            features['current_price'] = df['close_price'].iloc[-1]
-            features['price_change_1d'] = (df['close_price'].iloc[-1] - df['close_price'].iloc[-2]) / df['close_price'].iloc[-2] if len(df) > 1 else 0
-            features['price_change_7d'] = (df['close_price'].iloc[-1] - df['close_price'].iloc[-7]) / df['close_price'].iloc[-7] if len(df) > 7 else 0
-            features['price_change_30d'] = (df['close_price'].iloc[-1] - df['close_price'].iloc[0]) / df['close_price'].iloc[0] if len(df) > 1 else 0
-            
-            # Volatility features
-            df['returns'] = df['close_price'].pct_change()
-            features['volatility_7d'] = df['returns'].tail(7).std() if len(df) > 7 else 0
-            features['volatility_30d'] = df['returns'].std() if len(df) > 1 else 0
-            
-            # Volume features
-            features['avg_volume_7d'] = df['volume'].tail(7).mean() if len(df) > 7 else 0
-            features['avg_volume_30d'] = df['volume'].mean() if len(df) > 1 else 0
-            features['volume_trend'] = (df['volume'].tail(7).mean() / df['volume'].head(7).mean()) - 1 if len(df) > 14 else 0
-            
-            # Technical indicators
-            features['rsi'] = self._calculate_rsi(df['close_price'])
-            features['moving_avg_ratio'] = df['close_price'].iloc[-1] / df['close_price'].tail(20).mean() if len(df) > 20 else 1
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # Price features
+                features['current_price'] = close[-1]
+                features['price_change_1d'] = (close[-1] - close[-2]) / close[-2] if n > 1 else 0
+                features['price_change_7d'] = (close[-1] - close[-7]) / close[-7] if n > 7 else 0
+                features['price_change_30d'] = (close[-1] - close[0]) / close[0] if n > 1 else 0
+                
+                # Volatility features (sample std, as pandas computes it)
+                returns = np.diff(close) / close[:-1]
+                features['volatility_7d'] = returns[-7:].std(ddof=1) if n > 7 else 0
+                features['volatility_30d'] = returns.std(ddof=1) if n > 2 else 0
+                
+                # Volume features
+                features['avg_volume_7d'] = volume[-7:].mean() if n > 7 else 0
+                features['avg_volume_30d'] = volume.mean() if n > 1 else 0
+                features['volume_trend'] = (volume[-7:].mean() / volume[:7].mean()) - 1 if n > 14 else 0
+                
+                # Technical indicators
+                features['rsi'] = self._calculate_rsi(close)
+                features['moving_avg_ratio'] = close[-1] / close[-20:].mean() if n > 20 else 1
             
         except Exception as e:
             logger.error(f"Error extracting market features: {e}")
-            features = self._get_default_market_features()
+            features = DEFAULT_MARKET_FEATURES
         
         return features
     
-    def _extract_sentiment_features(self, company_id: int) -> Dict:
+    def _extract_sentiment_features(self, company_ids: pd.Index) -> pd.DataFrame:
         """Extract news sentiment and event-based features"""
-        features = {}
+        defaults = self._default_frame(company_ids, DEFAULT_SENTIMENT_FEATURES)
         
         try:
-            # Get recent news events
-            news_events = self.db.get_recent_news_events(company_id, days=7)
-            
-            if not news_events:
-                return self._get_default_sentiment_features()
-            
-            df = pd.DataFrame(news_events)
-            
-            # Sentiment features
-            features['avg_sentiment_7d'] = df['sentiment_score'].mean()
-            features['sentiment_trend'] = df['sentiment_score'].tail(3).mean() - df['sentiment_score'].head(3).mean() if len(df) > 6 else 0
-            features['sentiment_volatility'] = df['sentiment_score'].std()
-            
-            # Impact features
-            features['avg_impact_7d'] = df['impact_score'].mean()
-            features['max_impact_7d'] = df['impact_score'].max()
-            features['high_impact_events'] = len(df[df['impact_score'] > 70])
+            # Get recent news events, newest first within each company
+            news = self.db.get_recent_news_events_bulk(days=7)
+            
+            if news.empty:
+                return defaults
+            
+            by_company = news.assign(high_impact=news['impact_score'] > 70).groupby('company_id')
+            
+            # Sentiment and impact features, all in one grouped pass
+            features = by_company.agg(
+                avg_sentiment_7d=('sentiment_score', 'mean'),
+                sentiment_volatility=('sentiment_score', 'std'),
+                avg_impact_7d=('impact_score', 'mean'),
+                max_impact_7d=('impact_score', 'max'),
+                news_frequency_7d=('sentiment_score', 'size'),
+                high_impact_events=('high_impact', 'sum')
+            )
+            oldest = by_company.tail(3).groupby('company_id')['sentiment_score'].mean()
+            newest = by_company.head(3).groupby('company_id')['sentiment_score'].mean()
+            features['sentiment_trend'] = (oldest - newest).where(features['news_frequency_7d'] > 6, 0)
             
             # Event type features
-            event_types = df['event_type'].value_counts()
-            features['financial_events'] = event_types.get('financial', 0)
-            features['legal_events'] = event_types.get('legal', 0)
-            features['management_events'] = event_types.get('management', 0)
-            features['corporate_action_events'] = event_types.get('corporate_action', 0)
+            event_counts = pd.crosstab(news['company_id'], news['event_type']).reindex(
+                columns=EVENT_TYPES, fill_value=0
+            )
+            features[[f'{event_type}_events' for event_type in EVENT_TYPES]] = event_counts
             
-            # News frequency
-            features['news_frequency_7d'] = len(df)
+            # Companies without news get the default profile
+            has_news = pd.Series(company_ids.isin(news['company_id']), index=company_ids)
+            return features[defaults.columns].reindex(company_ids).where(has_news, defaults, axis=0)
             
         except Exception as e:
             logger.error(f"Error extracting sentiment features: {e}")
-            features = self._get_default_sentiment_features()
-        
-        return features
+            return defaults
     
-    def _extract_technical_features(self, company_id: int) -> Dict:
+    def _extract_technical_features(self, companies: pd.DataFrame) -> pd.DataFrame:
         """Extract technical analysis features"""
-        features = {}
-        
         try:
-            # Get company info for sector/industry
-            company_info = self.db.get_company_info(company_id)
+            features = pd.DataFrame(index=companies.index)
             
-            if company_info:
-                # Sector encoding (simplified)
-                sector_mapping = {
-                    'Technology': 1,
-                    'Financial Services': 2,
-                    'Healthcare': 3,
-                    'Consumer Cyclical': 4,
-                    'Consumer Defensive': 5,
-                    'Energy': 6,
-                    'Utilities': 7,
-                    'Real Estate': 8,
-                    'Materials': 9,
-                    'Industrials': 10
-                }
-                
-                features['sector_code'] = sector_mapping.get(company_info.get('sector', ''), 0)
-                features['market_cap_log'] = np.log(company_info.get('market_cap', 1000000000))
-            else:
-                features['sector_code'] = 0
-                features['market_cap_log'] = 20  # Default log value
+            # Sector encoding (simplified)
+            features['sector_code'] = companies['sector'].map(SECTOR_CODES).fillna(0).astype(int)
+            features['market_cap_log'] = np.log(companies['market_cap'].fillna(1000000000))
             
             # Time-based features
             now = datetime.utcnow()
@@ -225,150 +272,75 @@ class FeatureEngineer:
             features['month'] = now.month
             features['quarter'] = (now.month - 1) // 3 + 1
             
+            return features
+            
         except Exception as e:
             logger.error(f"Error extracting technical features: {e}")
-            features = {'sector_code': 0, 'market_cap_log': 20, 'day_of_week': 0, 'month': 1, 'quarter': 1}
-        
-        return features
+            return self._default_frame(
+                companies.index, {'sector_code': 0, 'market_cap_log': 20, 'day_of_week': 0, 'month': 1, 'quarter': 1}
+            )
     
-    def _calculate_rsi(self, prices: pd.Series, window: int = 14) -> float:
+    def _calculate_rsi(self, prices: np.ndarray, window: int = 14) -> float:
         """Calculate Relative Strength Index"""
         try:
             if len(prices) < window + 1:
                 return 50.0  # Neutral RSI
             
-            delta = prices.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+            # Only the last window's price changes feed the final value, so average
+            # those directly instead of rolling over the whole series
+            delta = np.diff(np.asarray(prices, dtype=np.float64)[-(window + 1):])
+            gain = np.where(delta > 0, delta, 0).mean()
+            loss = np.where(delta < 0, -delta, 0).mean()
             
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = 100 - (100 / (1 + gain / loss))
             
-            return rsi.iloc[-1] if not pd.isna(rsi.iloc[-1]) else 50.0
+            return float(rsi) if not np.isnan(rsi) else 50.0
         except:
             return 50.0
     
-    def _get_default_financial_features(self) -> Dict:
-        """Return default financial features when data is not available"""
-        return {
-            'debt_to_equity': 0.5,
-            'current_ratio': 1.2,
-            'pe_ratio': 15.0,
-            'roe': 0.1,
-            'revenue_growth': 0.05,
-            'market_cap': 1000000000,
-            'total_revenue': 1000000000,
-            'total_assets': 1000000000,
-            'gross_profit': 200000000,
-            'net_income': 50000000,
-            'ebitda': 150000000,
-            'profit_margin': 0.05,
-            'gross_margin': 0.2,
-            'asset_turnover': 1.0,
-            'log_market_cap': 20.7,
-            'log_total_revenue': 20.7,
-            'log_total_assets': 20.7,
-            'log_gross_profit': 19.1,
-            'log_net_income': 17.7,
-            'log_ebitda': 18.8
-        }
-    
-    def _get_default_market_features(self) -> Dict:
-        """Return default market features when data is not available"""
-        return {
-            'current_price': 100.0,
-            'price_change_1d': 0.0,
-            'price_change_7d': 0.0,
-            'price_change_30d': 0.0,
-            'volatility_7d': 0.02,
-            'volatility_30d': 0.02,
-            'avg_volume_7d': 1000000,
-            'avg_volume_30d': 1000000,
-            'volume_trend': 0.0,
-            'rsi': 50.0,
-            'moving_avg_ratio': 1.0
-        }
-    
-    def _get_default_sentiment_features(self) -> Dict:
-        """Return default sentiment features when data is not available"""
-        return {
-            'avg_sentiment_7d': 50.0,
-            'sentiment_trend': 0.0,
-            'sentiment_volatility': 5.0,
-            'avg_impact_7d': 30.0,
-            'max_impact_7d': 50.0,
-            'high_impact_events': 0,
-            'financial_events': 0,
-            'legal_events': 0,
-            'management_events': 0,
-            'corporate_action_events': 0,
-            'news_frequency_7d': 0
-        }
-    
     def prepare_training_data(self) -> Optional[pd.DataFrame]:
         """Prepare training data for model retraining"""
         try:
-            # Get all companies
-            companies = self.db.get_all_companies()
+            # Features for every company
+            features = self.extract_features_bulk()
             
-            training_data = []
+            if features is None or features.empty:
+                return None
             
-            for company in companies:
-                company_id = company['id']
-                
-                # Extract features
-                features = self.extract_features(company_id)
-                
-                if features is not None:
-                    # Generate synthetic target score for training
-                    # In a real scenario, you'd have historical credit ratings or default data
-                    target_score = self._generate_synthetic_target(features.iloc[0])
-                    
-                    feature_row = features.iloc[0].to_dict()
-                    feature_row['target_score'] = target_score
-                    
-                    training_data.append(feature_row)
+            # Generate synthetic target scores for training
+            # In a real scenario, you'd have historical credit ratings or default data
+            training_data = features.reset_index(drop=True)
+            training_data['target_score'] = self._generate_synthetic_target(training_data)
+            return training_data
             
-            if training_data:
-                return pd.DataFrame(training_data)
-            else:
-                return None
-                
         except Exception as e:
             logger.error(f"Error preparing training data: {e}")
             return None
     
-    def _generate_synthetic_target(self, features: pd.Series) -> float:
-        """Generate synthetic target score for training (placeholder)"""
+    def _generate_synthetic_target(self, features: pd.DataFrame) -> np.ndarray:
+        """Generate synthetic target scores for every row of features (placeholder)"""
         # This is a simplified synthetic target generation
         # In practice, you'd use historical credit ratings or default probabilities
         
-        base_score = 0.6  # Base creditworthiness
+        base_score = np.full(len(features), 0.6)  # Base creditworthiness
         
         # Adjust based on financial health
-        if features.get('debt_to_equity', 0) > 1.0:
-            base_score -= 0.1
-        if features.get('current_ratio', 1) < 1.0:
-            base_score -= 0.1
-        if features.get('roe', 0) > 0.15:
-            base_score += 0.1
+        base_score -= 0.1 * (features.get('debt_to_equity', 0) > 1.0)
+        base_score -= 0.1 * (features.get('current_ratio', 1) < 1.0)
+        base_score += 0.1 * (features.get('roe', 0) > 0.15)
         
         # Adjust based on market performance
-        if features.get('price_change_30d', 0) < -0.2:
-            base_score -= 0.1
-        if features.get('volatility_30d', 0) > 0.05:
-            base_score -= 0.05
+        base_score -= 0.1 * (features.get('price_change_30d', 0) < -0.2)
+        base_score -= 0.05 * (features.get('volatility_30d', 0) > 0.05)
         
         # Adjust based on sentiment
         sentiment = features.get('avg_sentiment_7d', 50)
-        if sentiment < 40:
-            base_score -= 0.1
-        elif sentiment > 60:
-            base_score += 0.05
+        base_score -= 0.1 * (sentiment < 40)
+        base_score += 0.05 * (sentiment > 60)
         
         # Add some noise
-        noise = np.random.normal(0, 0.05)
-        base_score += noise
+        base_score += np.random.normal(0, 0.05, len(features))
         
-        # Ensure score is between 0 and 1
-        return max(0.1, min(0.9, base_score))
\ No newline at end of file
+        # Ensure scores are between 0 and 1
+        return np.clip(base_score, 0.1, 0.9)
\ No newline at end of file
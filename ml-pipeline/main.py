@@ -1,71 +1,129 @@
 import schedule
 import time
 import logging
+import os
+import pandas as pd
 from datetime import datetime
 from credit_scoring_model import CreditScoringModel
 from feature_engineering import FeatureEngineer
 from database import DatabaseManager
 
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Response cache keys owned by the API (see api/cache.py)
+API_CACHE_KEYS = ("dashboard:v1", "analytics:v1")
+API_CACHE_KEY_PATTERNS = ("explanation:v1:*",)
+
 class MLPipelineService:
     def __init__(self):
         self.db = DatabaseManager()
         self.feature_engineer = FeatureEngineer(self.db)
         self.model = CreditScoringModel(self.db)
         
+        redis_url = os.getenv("REDIS_URL")
+        self.cache = redis.Redis.from_url(redis_url) if HAS_REDIS and redis_url else None
+        
+        # Hash of each company's feature row at its last stored score, and the model
+        # version that scored it; an unchanged row under the same model is not re-scored
+        self._scored_hashes = {}
+        self._scored_model_version = None
+    
+    def invalidate_api_cache(self):
+        """Drop cached API responses so new scores are served immediately"""
+        if self.cache is None:
+            return
+        
+        try:
+            keys = list(API_CACHE_KEYS)
+            for pattern in API_CACHE_KEY_PATTERNS:
+                keys.extend(self.cache.scan_iter(match=pattern))
+            self.cache.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Could not invalidate API cache: {e}")
+        
     def run_scoring_pipeline(self):
         """Run the complete ML scoring pipeline"""
         try:
             logger.info("Starting ML scoring pipeline...")
             
-            # Get all companies
-            companies = self.db.get_all_companies()
+            # Get all companies once; feature extraction reuses the same frame
+            companies = self.db.get_companies_df()
+            symbols = dict(zip(companies['id'], companies['symbol']))
             
-            for company in companies:
-                company_id = company['id']
-                symbol = company['symbol']
-                
-                logger.info(f"Processing {symbol} (ID: {company_id})")
+            # Extract features for every company in one pass, then score them in one model call
+            features = self.feature_engineer.extract_features_bulk(companies)
+            
+            score_rows = []
+            importance_rows = []
+            
+            if features is not None and len(features) > 0:
+                if self.model.model_version != self._scored_model_version:
+                    self._scored_hashes = {}
+                    self._scored_model_version = self.model.model_version
                 
-                # Extract features
-                features = self.feature_engineer.extract_features(company_id)
+                row_hashes = pd.util.hash_pandas_object(features, index=False)
+                changed = [
+                    self._scored_hashes.get(company_id) != row_hash
+                    for company_id, row_hash in row_hashes.items()
+                ]
+                unchanged_count = len(features) - sum(changed)
+                if unchanged_count:
+                    logger.info(f"Skipping {unchanged_count} companies with unchanged features")
+                features = features[changed]
+                row_hashes = row_hashes[changed]
+            
+            if features is not None and len(features) > 0:
+                score_results = self.model.predict_batch(features.reset_index(drop=True))
+                if not score_results:
+                    logger.warning("Could not generate scores")
+                    score_results = []
                 
-                if features is not None and len(features) > 0:
-                    # Generate credit score
-                    score_result = self.model.predict_credit_score(features, company_id)
+                now = datetime.utcnow()
+                for company_id, score_result in zip(features.index, score_results):
+                    company_id = int(company_id)
                     
-                    if score_result:
-                        # Store the score
-                        self.db.insert_credit_score({
-                            'time': datetime.utcnow(),
+                    score_rows.append({
+                        'time': now,
+                        'company_id': company_id,
+                        'score': score_result['score'],
+                        'confidence': score_result['confidence'],
+                        'model_version': score_result['model_version']
+                    })
+                    
+                    for feature_name, importance_data in score_result['feature_importance'].items():
+                        importance_rows.append({
                             'company_id': company_id,
-                            'score': score_result['score'],
-                            'confidence': score_result['confidence'],
-                            'model_version': score_result['model_version']
+                            'timestamp': now,
+                            'feature_name': feature_name,
+                            'importance_value': importance_data['importance'],
+                            'shap_value': importance_data['shap_value'],
+                            'feature_value': importance_data['value']
                         })
-                        
-                        # Store feature importance
-                        for feature_name, importance_data in score_result['feature_importance'].items():
-                            self.db.insert_feature_importance({
-                                'company_id': company_id,
-                                'timestamp': datetime.utcnow(),
-                                'feature_name': feature_name,
-                                'importance_value': importance_data['importance'],
-                                'shap_value': importance_data['shap_value'],
-                                'feature_value': importance_data['value']
-                            })
-                        
-                        logger.info(f"Generated score {score_result['score']:.2f} for {symbol}")
-                    else:
-                        logger.warning(f"Could not generate score for {symbol}")
-                else:
-                    logger.warning(f"No features available for {symbol}")
-                
-                time.sleep(1)  # Small delay between companies
+                    
+                    logger.info(f"Generated score {score_result['score']:.2f} for {symbols.get(company_id, company_id)}")
+            elif features is None:
+                logger.warning("No features available")
+            
+            if not score_rows:
+                logger.info("ML scoring pipeline completed, no new scores to store")
+                return
+            
+            # One transaction each for every score and explanation produced in this run
+            if self.db.bulk_insert_credit_scores(score_rows):
+                self._scored_hashes.update(
+                    (int(company_id), row_hash) for company_id, row_hash in row_hashes.items()
+                )
+            self.db.bulk_insert_feature_importance(importance_rows)
             
+            self.invalidate_api_cache()
             logger.info("ML scoring pipeline completed")
             
         except Exception as e:
@@ -117,10 +175,11 @@ def main():
     # Run initial scoring
     service.run_scoring_pipeline()
     
-    # Keep the service running
+    # Sleep until the next job is due instead of polling on a fixed interval
     while True:
         schedule.run_pending()
-        time.sleep(60)
+        idle = schedule.idle_seconds()
+        time.sleep(max(idle, 0) if idle is not None else 60)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
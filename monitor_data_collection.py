@@ -7,17 +7,29 @@ import os
 import sys
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
+# One keep-alive session so each refresh reuses its connections to the API
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=2))
+
 def clear_screen():
     """Clear the terminal screen"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if os.name == 'nt':
+        os.system('cls')
+        return
+    
+    # Home the cursor and clear in place instead of forking a shell to run clear
+    sys.stdout.write('\x1b[H\x1b[2J')
+    sys.stdout.flush()
 
 def check_api_health():
     """Check if the API is running"""
     try:
-        response = requests.get("http://localhost:8000/health", timeout=5)
+        response = _SESSION.get("http://localhost:8000/health", timeout=5)
         return response.status_code == 200
     except:
         return False
@@ -25,25 +37,24 @@ def check_api_health():
 def get_dashboard_data():
     """Get dashboard data from API"""
     try:
-        response = requests.get("http://localhost:8000/dashboard", timeout=5)
+        response = _SESSION.get("http://localhost:8000/dashboard", timeout=5)
         if response.status_code == 200:
             return response.json()
         return None
     except:
         return None
 
-def get_companies_data():
-    """Get companies data from API"""
-    try:
-        response = requests.get("http://localhost:8000/companies", timeout=5)
-        if response.status_code == 200:
-            return response.json()
-        return []
-    except:
-        return []
-
 def display_status():
     """Display the current status"""
+    # Fire the health check and dashboard fetch together so a refresh waits for
+    # the slower of the two rather than both in turn; fetching before clearing
+    # keeps the previous screen up while the requests are in flight
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        health_future = executor.submit(check_api_health)
+        dashboard_future = executor.submit(get_dashboard_data)
+        api_healthy = health_future.result()
+        dashboard_data = dashboard_future.result()
+    
     clear_screen()
     
     print("🚀 CredTech Platform - Real-Time Data Collection Monitor")
@@ -51,8 +62,6 @@ def display_status():
     print(f"Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
-    # Check API health
-    api_healthy = check_api_health()
     status_icon = "✅" if api_healthy else "❌"
     print(f"{status_icon} API Server: {'Running' if api_healthy else 'Not responding'}")
     
@@ -61,20 +70,18 @@ def display_status():
         print("Please start the platform with: python start_with_real_data.py")
         return
     
-    # Get data
-    dashboard_data = get_dashboard_data()
-    companies = get_companies_data()
-    
     if dashboard_data:
+        alerts = dashboard_data.get('alerts') or []
+        companies_data = dashboard_data.get('companies') or []
+        
         print(f"✅ Database: Connected")
         print(f"📊 Total Companies: {dashboard_data.get('total_companies', 0)}")
-        print(f"🚨 Active Alerts: {len(dashboard_data.get('alerts', []))}")
+        print(f"🚨 Active Alerts: {len(alerts)}")
         
         # Display companies and their latest scores
         print("\n📈 Company Credit Scores:")
         print("-" * 50)
         
-        companies_data = dashboard_data.get('companies', [])
         if companies_data:
             for company in companies_data[:10]:  # Show first 10
                 score = company.get('current_score', 0)
@@ -104,7 +111,6 @@ def display_status():
             print("No company data available")
         
         # Display alerts
-        alerts = dashboard_data.get('alerts', [])
         if alerts:
             print(f"\n🚨 Recent Alerts ({len(alerts)}):")
             print("-" * 40)
@@ -7,14 +7,15 @@ import subprocess
 import sys
 import os
 import time
+from startup_common import (API_PROBE, NPM_CI_COMMAND, POSTGRES_PROBE, REDIS_PROBE, api_server_args, command_args,
+                            frontend_install_needed, mark_frontend_installed, wait_for_port)
 
 def run_command(command, cwd=None, check=True):
-    """Run a command and return the result"""
+    """Run a command and return the result; its output streams straight to the terminal"""
     try:
-        result = subprocess.run(command, shell=True, cwd=cwd, capture_output=True, text=True)
+        result = subprocess.run(command_args(command), cwd=cwd)
         if check and result.returncode != 0:
             print(f"Error running command: {command}")
-            print(f"Error output: {result.stderr}")
             return False
         return True
     except Exception as e:
@@ -30,7 +31,8 @@ def start_database():
         return False
     
     print("Waiting for database to be ready...")
-    time.sleep(10)
+    if not (wait_for_port(5432, POSTGRES_PROBE) and wait_for_port(6379, REDIS_PROBE)):
+        print("Database services are still starting, continuing anyway...")
     return True
 
 def populate_data():
@@ -49,28 +51,32 @@ def start_api():
     
     # Start API in background
     api_process = subprocess.Popen(
-        ["python", "-m", "uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8000", "--reload"],
+        [sys.executable, "-m", "uvicorn", *api_server_args()],
         cwd="api"
     )
     
     print("API server started (PID: {})".format(api_process.pid))
-    time.sleep(5)
+    wait_for_port(8000, API_PROBE, timeout=30)
     
     return api_process
 
 def start_frontend():
     """Start the frontend development server"""
-    print("Installing frontend dependencies...")
-    
-    if not run_command("npm install", cwd="frontend"):
-        print("Failed to install frontend dependencies")
-        return None
+    if not frontend_install_needed():
+        print("Frontend dependencies are up to date")
+    else:
+        print("Installing frontend dependencies...")
+        
+        if not run_command(NPM_CI_COMMAND, cwd="frontend"):
+            print("Failed to install frontend dependencies")
+            return None
+        mark_frontend_installed()
     
     print("Starting frontend server...")
     
     # Start frontend in background
     frontend_process = subprocess.Popen(
-        ["npm", "start"],
+        command_args("npm start"),
         cwd="frontend"
     )
     
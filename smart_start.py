@@ -3,18 +3,51 @@
 Smart startup script that automatically chooses Docker or SQLite mode
 """
 
+import json
 import subprocess
 import sys
-import os
+import time
+from pathlib import Path
 
-def check_docker_available():
-    """Check if Docker is available and running"""
+# A recent answer to "is Docker running" is reused so quick restarts skip the probe,
+# which can block for its full timeout when the daemon is unresponsive
+DOCKER_CHECK_CACHE = Path.home() / ".credtech" / "docker_check.json"
+DOCKER_CHECK_TTL = 60  # seconds
+
+def probe_docker():
+    """Ask the Docker daemon whether it is running"""
     try:
         result = subprocess.run(["docker", "ps"], capture_output=True, text=True, timeout=10)
         return result.returncode == 0
     except:
         return False
 
+def check_docker_available():
+    """Check if Docker is available and running"""
+    try:
+        if time.time() - DOCKER_CHECK_CACHE.stat().st_mtime < DOCKER_CHECK_TTL:
+            return json.loads(DOCKER_CHECK_CACHE.read_text())["available"]
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    available = probe_docker()
+    try:
+        DOCKER_CHECK_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        DOCKER_CHECK_CACHE.write_text(json.dumps({"available": available}))
+    except OSError:
+        pass
+    return available
+
+def run_script(script):
+    """Run a startup script with this interpreter, without a shell in between"""
+    process = subprocess.Popen([sys.executable, script])
+    while True:
+        try:
+            return process.wait()
+        except KeyboardInterrupt:
+            # The script got the same Ctrl+C; wait for its own shutdown to finish
+            continue
+
 def main():
     """Main function"""
     print("🚀 CredTech Platform - Smart Startup")
@@ -29,7 +62,7 @@ def main():
         print("=" * 40)
         
         # Run the Docker version
-        os.system("python start_with_real_data.py")
+        run_script("start_with_real_data.py")
     else:
         print("❌ Docker Desktop is not available")
         print("💾 Starting with SQLite (No Docker required)")
@@ -37,7 +70,7 @@ def main():
         print("=" * 40)
         
         # Run the SQLite version
-        os.system("python start_without_docker.py")
+        run_script("start_without_docker.py")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
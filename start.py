@@ -7,14 +7,15 @@ import subprocess
 import sys
 import os
 import time
+from startup_common import API_PROBE, POSTGRES_PROBE, REDIS_PROBE, command_args, wait_for_port
 
-def run_command(command, cwd=None):
-    """Run a command and return the result"""
+def run_command(command, cwd=None, quiet=False):
+    """Run a command and return the result; its output streams to the terminal unless quiet"""
+    output = subprocess.DEVNULL if quiet else None
     try:
-        result = subprocess.run(command, shell=True, cwd=cwd, capture_output=True, text=True)
+        result = subprocess.run(command_args(command), cwd=cwd, stdout=output, stderr=output)
         if result.returncode != 0:
             print(f"Error running command: {command}")
-            print(f"Error output: {result.stderr}")
             return False
         return True
     except Exception as e:
@@ -26,12 +27,12 @@ def check_dependencies():
     print("Checking dependencies...")
     
     # Check Docker
-    if not run_command("docker --version"):
+    if not run_command("docker --version", quiet=True):
         print("Docker is not installed or not in PATH")
         return False
     
     # Check Docker Compose
-    if not run_command("docker-compose --version"):
+    if not run_command("docker-compose --version", quiet=True):
         print("Docker Compose is not installed or not in PATH")
         return False
     
@@ -51,7 +52,13 @@ def start_services():
     
     # Wait for services to be ready
     print("Waiting for services to be ready...")
-    time.sleep(30)
+    ready = (
+        wait_for_port(5432, POSTGRES_PROBE)
+        and wait_for_port(6379, REDIS_PROBE)
+        and wait_for_port(8000, API_PROBE)
+    )
+    if not ready:
+        print("Services are still starting, continuing anyway...")
     
     # Check service health
     if run_command("docker-compose ps"):
@@ -6,9 +6,33 @@ Start CredTech Platform with real data collection
 import subprocess
 import sys
 import os
-import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from startup_common import (API_PROBE, NPM_CI_COMMAND, POSTGRES_PROBE, REDIS_PROBE, api_server_args, clear_probe_cache,
+                            command_args, frontend_install_needed, mark_frontend_installed, probe_get,
+                            stop_processes, wait_for_port, watch_processes)
+
+def check_alpha_vantage(api_key):
+    """Report whether the Alpha Vantage key answers a company overview request"""
+    try:
+        url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol=AAPL&apikey={api_key}"
+        response = probe_get(url, 'Symbol')
+        if response.status_code == 200 and 'Symbol' in response.text:
+            return "✅ Alpha Vantage API key is working"
+        return "⚠️  Alpha Vantage API key may have issues"
+    except Exception as e:
+        return f"⚠️  Alpha Vantage API test failed: {e}"
+
+def check_news_api(api_key):
+    """Report whether the News API key answers a search request"""
+    try:
+        url = f"https://newsapi.org/v2/everything?q=Apple&apiKey={api_key}&pageSize=1"
+        response = probe_get(url, 'articles')
+        if response.status_code == 200 and 'articles' in response.text:
+            return "✅ News API key is working"
+        return "⚠️  News API key may have issues"
+    except Exception as e:
+        return f"⚠️  News API test failed: {e}"
 
 def test_api_keys():
     """Test if the API keys are working"""
@@ -16,40 +40,22 @@ def test_api_keys():
     
     print("Testing API keys...")
     
-    # Test Alpha Vantage API
     alpha_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-    if alpha_key and alpha_key != 'demo':
-        try:
-            url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol=AAPL&apikey={alpha_key}"
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200 and 'Symbol' in response.text:
-                print("✅ Alpha Vantage API key is working")
-            else:
-                print("⚠️  Alpha Vantage API key may have issues")
-        except Exception as e:
-            print(f"⚠️  Alpha Vantage API test failed: {e}")
-    else:
-        print("⚠️  Alpha Vantage API key not configured")
-    
-    # Test News API
     news_key = os.getenv('NEWS_API_KEY')
-    if news_key and news_key != 'demo':
-        try:
-            url = f"https://newsapi.org/v2/everything?q=Apple&apiKey={news_key}&pageSize=1"
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200 and 'articles' in response.text:
-                print("✅ News API key is working")
-            else:
-                print("⚠️  News API key may have issues")
-        except Exception as e:
-            print(f"⚠️  News API test failed: {e}")
-    else:
-        print("⚠️  News API key not configured")
+    clear_probe_cache()
+    
+    # The providers are checked concurrently, so the wait is the slowest one rather than the sum
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        alpha_result = executor.submit(check_alpha_vantage, alpha_key) if alpha_key and alpha_key != 'demo' else None
+        news_result = executor.submit(check_news_api, news_key) if news_key and news_key != 'demo' else None
+        
+        print(alpha_result.result() if alpha_result else "⚠️  Alpha Vantage API key not configured")
+        print(news_result.result() if news_result else "⚠️  News API key not configured")
 
 def run_command(command, cwd=None, check=True):
     """Run a command and return the result"""
     try:
-        result = subprocess.run(command, shell=True, cwd=cwd, capture_output=True, text=True)
+        result = subprocess.run(command_args(command), cwd=cwd, capture_output=True, text=True)
         if check and result.returncode != 0:
             print(f"Error running command: {command}")
             print(f"Error output: {result.stderr}")
@@ -68,7 +74,8 @@ def start_database():
         return False
     
     print("Waiting for database to be ready...")
-    time.sleep(15)
+    if not (wait_for_port(5432, POSTGRES_PROBE) and wait_for_port(6379, REDIS_PROBE)):
+        print("Database services are still starting, continuing anyway...")
     return True
 
 def populate_initial_data():
@@ -86,7 +93,7 @@ def start_data_ingestion():
     
     # Start data ingestion in background
     ingestion_process = subprocess.Popen(
-        ["python", "main.py"],
+        [sys.executable, "main.py"],
         cwd="data-ingestion"
     )
     
@@ -99,7 +106,7 @@ def start_ml_pipeline():
     
     # Start ML pipeline in background
     ml_process = subprocess.Popen(
-        ["python", "main.py"],
+        [sys.executable, "main.py"],
         cwd="ml-pipeline"
     )
     
@@ -112,28 +119,36 @@ def start_api():
     
     # Start API in background
     api_process = subprocess.Popen(
-        ["python", "-m", "uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8000", "--reload"],
+        [sys.executable, "-m", "uvicorn", *api_server_args()],
         cwd="api"
     )
     
     print(f"API server started (PID: {api_process.pid})")
-    time.sleep(5)
+    wait_for_port(8000, API_PROBE, timeout=30)
     
     return api_process
 
-def start_frontend():
-    """Start frontend development server"""
+def install_frontend_dependencies():
+    """Install frontend dependencies"""
+    if not frontend_install_needed():
+        print("Frontend dependencies are up to date")
+        return True
+    
     print("Installing frontend dependencies...")
     
-    if not run_command("npm install", cwd="frontend"):
+    if not run_command(NPM_CI_COMMAND, cwd="frontend"):
         print("Failed to install frontend dependencies")
-        return None
-    
+        return False
+    mark_frontend_installed()
+    return True
+
+def start_frontend():
+    """Start frontend development server"""
     print("Starting frontend server...")
     
     # Start frontend in background
     frontend_process = subprocess.Popen(
-        ["npm", "start"],
+        command_args("npm start"),
         cwd="frontend"
     )
     
@@ -145,25 +160,30 @@ def main():
     print("CredTech Platform - Real Data Collection Mode")
     print("=" * 50)
     
-    # Test API keys
-    test_api_keys()
-    print()
-    
-    # Start database services
-    if not start_database():
-        sys.exit(1)
-    
-    # Populate initial data
-    populate_initial_data()
-    
-    # Start all services
-    api_process = start_api()
-    if not api_process:
-        sys.exit(1)
-    
-    ingestion_process = start_data_ingestion()
-    ml_process = start_ml_pipeline()
-    frontend_process = start_frontend()
+    # npm install is the slowest step and needs nothing from the database or the other
+    # services, so it runs in the background while they are set up and started
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        npm_install = executor.submit(install_frontend_dependencies)
+        
+        # Test API keys
+        test_api_keys()
+        print()
+        
+        # Start database services
+        if not start_database():
+            sys.exit(1)
+        
+        # Populate initial data
+        populate_initial_data()
+        
+        # Start all services
+        api_process = start_api()
+        if not api_process:
+            sys.exit(1)
+        
+        ingestion_process = start_data_ingestion()
+        ml_process = start_ml_pipeline()
+        frontend_process = start_frontend() if npm_install.result() else None
     
     print("\n" + "=" * 60)
     print("🚀 CredTech Platform is running with REAL DATA!")
@@ -188,26 +208,18 @@ def main():
     processes = [p for p in [api_process, ingestion_process, ml_process, frontend_process] if p]
     
     try:
-        # Keep the script running and monitor processes
-        while True:
-            # Check if any process has died
-            for process in processes:
-                if process.poll() is not None:
-                    print(f"Warning: Process {process.pid} has stopped")
-            
-            time.sleep(5)
+        # Sleep until a service exits instead of polling them; returns once none are left
+        watch_processes(processes)
+        print("\nAll services have exited")
     except KeyboardInterrupt:
         print("\nStopping services...")
-        
-        for process in processes:
-            if process:
-                process.terminate()
-                print(f"Process {process.pid} stopped")
-        
-        run_command("docker-compose down", check=False)
-        print("Database services stopped")
-        
-        print("✅ All services stopped")
+    
+    stop_processes(processes)
+    
+    run_command("docker-compose down", check=False)
+    print("Database services stopped")
+    
+    print("✅ All services stopped")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,24 +5,36 @@ Test real data collection with API keys
 
 import os
 import sys
-import requests
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import json
+from startup_common import clear_probe_cache, probe_get
 
-def test_alpha_vantage():
+def alpha_vantage_url():
+    """Company overview request for the configured Alpha Vantage key, or None"""
+    api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
+    if not api_key or api_key == 'demo':
+        return None
+    return f"https://www.alphavantage.co/query?function=OVERVIEW&symbol=AAPL&apikey={api_key}"
+
+def news_api_url():
+    """News search request for the configured News API key, or None"""
+    api_key = os.getenv('NEWS_API_KEY')
+    if not api_key or api_key == 'demo':
+        return None
+    return f"https://newsapi.org/v2/everything?q=Apple&apiKey={api_key}&pageSize=3&sortBy=publishedAt"
+
+def test_alpha_vantage(pending_response):
     """Test Alpha Vantage API"""
     print("Testing Alpha Vantage API...")
     
-    api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-    if not api_key or api_key == 'demo':
+    if pending_response is None:
         print("❌ Alpha Vantage API key not configured")
         return False
     
     try:
         # Test company overview
-        url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol=AAPL&apikey={api_key}"
-        response = requests.get(url, timeout=10)
+        response = pending_response.result()
         
         if response.status_code == 200:
             data = response.json()
@@ -40,19 +52,17 @@ def test_alpha_vantage():
         print(f"❌ Alpha Vantage API exception: {e}")
         return False
 
-def test_news_api():
+def test_news_api(pending_response):
     """Test News API"""
     print("Testing News API...")
     
-    api_key = os.getenv('NEWS_API_KEY')
-    if not api_key or api_key == 'demo':
+    if pending_response is None:
         print("❌ News API key not configured")
         return False
     
     try:
         # Test news search
-        url = f"https://newsapi.org/v2/everything?q=Apple&apiKey={api_key}&pageSize=3&sortBy=publishedAt"
-        response = requests.get(url, timeout=10)
+        response = pending_response.result()
         
         if response.status_code == 200:
             data = response.json()
@@ -78,15 +88,18 @@ def test_yahoo_finance():
     print("Testing Yahoo Finance...")
     
     try:
-        # Test stock data
+        # yfinance pulls in pandas and lxml, so it is only imported when this check runs
+        import yfinance as yf
+        
+        # Test stock data; the latest close comes from the same history request, which
+        # saves the separate (and much slower) .info quote-page scrape
         ticker = yf.Ticker("AAPL")
-        info = ticker.info
         hist = ticker.history(period="5d")
         
-        if info and not hist.empty:
+        if not hist.empty:
             print("✅ Yahoo Finance working")
-            print(f"   Company: {info.get('longName', 'N/A')}")
-            print(f"   Current Price: ${info.get('currentPrice', 'N/A')}")
+            print(f"   Last close: ${hist['Close'].iloc[-1]:.2f} on {hist.index[-1]:%Y-%m-%d}")
+            print(f"   Volume: {int(hist['Volume'].iloc[-1]):,}")
             print(f"   Historical data points: {len(hist)}")
             return True
         else:
@@ -115,6 +128,17 @@ def test_data_collectors():
                 print(f"   Would insert market data: {data['symbol']} - ${data['close_price']}")
             def insert_financial_data(self, data):
                 print(f"   Would insert financial data: {data['metric_name']} = {data['value']}")
+            def bulk_insert_market_data(self, rows):
+                for data in rows:
+                    self.insert_market_data(data)
+            def upsert_market_dataframe(self, df):
+                self.bulk_insert_market_data(df.to_dict('records'))
+            def bulk_insert_financial_data(self, rows):
+                for data in rows:
+                    self.insert_financial_data(data)
+            def bulk_insert_news_events(self, rows):
+                for data in rows:
+                    self.insert_news_event(data)
             def insert_news_event(self, data):
                 print(f"   Would insert news: {data['headline'][:50]}...")
         
@@ -149,10 +173,20 @@ def main():
     
     # Load environment variables
     load_dotenv()
+    clear_probe_cache()
+    
+    # Both key checks are plain HTTP requests: send them now so they are in flight
+    # together, then report each one in order below
+    executor = ThreadPoolExecutor(max_workers=2)
+    pending = {
+        name: executor.submit(probe_get, url, marker) if url else None
+        for name, url, marker in (("alpha_vantage", alpha_vantage_url(), 'Symbol'),
+                                  ("news_api", news_api_url(), 'articles'))
+    }
     
     tests = [
-        ("Alpha Vantage API", test_alpha_vantage),
-        ("News API", test_news_api),
+        ("Alpha Vantage API", lambda: test_alpha_vantage(pending["alpha_vantage"])),
+        ("News API", lambda: test_news_api(pending["news_api"])),
         ("Yahoo Finance", test_yahoo_finance),
         ("Data Collectors", test_data_collectors)
     ]
@@ -167,6 +201,8 @@ def main():
             passed += 1
         print()
     
+    executor.shutdown()
+    
     print("=" * 45)
     print(f"Results: {passed}/{total} tests passed")
     
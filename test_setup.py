@@ -32,24 +32,21 @@ def test_python_imports():
     
     failed_imports = []
     
+    # Only whether each package can be found matters here, so locate it with find_spec
+    # rather than importing it and running pandas/sklearn/shap's start-up code
     for package in required_packages:
-        try:
-            if package == 'sklearn':
-                import sklearn
-            else:
-                __import__(package)
+        if importlib.util.find_spec(package) is not None:
             print(f"✓ {package}")
-        except ImportError as e:
-            print(f"✗ {package}: {e}")
+        else:
+            print(f"✗ {package}: not installed")
             failed_imports.append(package)
     
     # Test optional packages
     print("\nTesting optional packages...")
     for package in optional_packages:
-        try:
-            __import__(package)
+        if importlib.util.find_spec(package) is not None:
             print(f"✓ {package} (optional)")
-        except ImportError:
+        else:
             print(f"- {package} (optional, not installed)")
     
     if failed_imports:
@@ -98,13 +95,11 @@ def test_environment_variables():
     """Test if environment variables are set"""
     print("\nTesting environment variables...")
     
-    # Load .env file
+    # Load .env file; python-dotenv is imported here so the import check above can still
+    # report it missing, and it handles quoting, comments and export prefixes
     if os.path.exists('.env'):
-        with open('.env', 'r') as f:
-            for line in f:
-                if '=' in line and not line.startswith('#'):
-                    key, value = line.strip().split('=', 1)
-                    os.environ[key] = value
+        from dotenv import dotenv_values
+        os.environ.update({key: value for key, value in dotenv_values('.env').items() if value is not None})
     
     required_vars = [
         'DATABASE_URL',